@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from sweep import make_grid, run_sweep
+
+# Values of a 'schedule' column and what they mean
+SCHEDULE = {'charge': 1, 'discharge': -1, 'idle': 0}
+
+
+class AnnualSimulation:
+    """
+    Hourly operation of a Carnot battery over a year of ambient temperatures.
+
+    Hours are grouped into ambient temperature bins of ``bin_width``, each bin is
+    solved once for charging and discharging (through ``run_sweep``, so cached solves
+    are reused) and kept in a performance table for all later hours. The storage is
+    charged and discharged at the heat flows of the design mass flows, limited by its
+    capacity and state of charge.
+
+    Args:
+        model (str): One of MODELS, e.g. 'model1_ihx' or 'model2_ihx'.
+        Tsto_in, Tsto_out (float): Storage temperatures in °C.
+        capacity (float): Thermal storage capacity in kWh.
+        bin_width (float, optional): Ambient temperature bin width in K. Default is 1.
+        loss (float, optional): Share of the stored heat lost per hour, compounded over
+            rows longer or shorter than an hour. Default is 0.
+        soc (float, optional): Initial stored heat in kWh. Default is 0.
+        price_charge, price_discharge (float, optional): Without a 'schedule' column,
+            charge at prices up to ``price_charge`` and discharge from ``price_discharge``.
+        cache (ResultCache, optional): Result cache of the bin solves.
+        workers (int, optional): Number of processes for solving new bins.
+    """
+
+    def __init__(self, model, Tsto_in, Tsto_out, capacity, bin_width=1.0, loss=0.0, soc=0.0,
+                 price_charge=None, price_discharge=None, cache=None, workers=None):
+        self.model = model
+        self.Tsto_in = Tsto_in
+        self.Tsto_out = Tsto_out
+        self.capacity = capacity
+        self.bin_width = bin_width
+        self.loss = loss
+        self.soc = soc
+        self.price_charge = price_charge
+        self.price_discharge = price_discharge
+        self.cache = cache
+        self.workers = workers
+        self.table = {}
+
+    def bins(self, Tenv):
+        """Ambient temperature bin centres of hourly temperatures."""
+        return np.round(np.asarray(Tenv, dtype=float) / self.bin_width) * self.bin_width
+
+    def solve_bins(self, bins):
+        """Solve the bins that are not in the performance table yet."""
+        new = sorted({round(float(b), 6) for b in bins} - set(self.table))
+        if not new:
+            return
+        df = run_sweep(self.model, make_grid([self.Tsto_in], [self.Tsto_out], new), workers=self.workers,
+                       cache=self.cache)
+        for row in df.to_dict('records'):
+            converged = row['converged (char)'] and row['converged (dis)']
+            self.table[round(float(row['Tenv']), 6)] = row if converged else None
+
+    def schedule(self, chunk):
+        """Operating mode per hour: 1 charge, -1 discharge, 0 idle."""
+        if 'schedule' in chunk.columns:
+            return chunk['schedule'].map(lambda s: SCHEDULE.get(s, s)).to_numpy(dtype=int)
+        if 'price' in chunk.columns and self.price_charge is not None and self.price_discharge is not None:
+            price = chunk['price'].to_numpy(dtype=float)
+            return np.where(price <= self.price_charge, 1, np.where(price >= self.price_discharge, -1, 0))
+        raise ValueError("The profile needs a 'schedule' column or a 'price' column with price thresholds.")
+
+    def run(self, path, chunksize=744, dt=1.0, out=None):
+        """
+        Simulate a profile read from a CSV file chunk by chunk.
+
+        Args:
+            path (str): CSV with a 'Tenv' column in °C and either a 'schedule' column
+                ('charge'/'discharge'/'idle' or 1/-1/0) or a 'price' column in €/kWh.
+            chunksize (int, optional): Rows read at once. Default is one month of hours.
+            dt (float, optional): Duration of one row in h. Default is 1.
+            out (str, optional): CSV file the hourly state of charge and energies are
+                written to, chunk by chunk.
+
+        Returns:
+            dict: Annual electricity in and out [kWh], heat charged and discharged [kWh],
+            round-trip efficiency, exergy destruction and loss [kWh], heat lost from
+            the storage [kWh], final state of charge [kWh], cost and revenue (with
+            prices) and the number of hours per mode and of unsolved bins.
+        """
+        totals = dict.fromkeys(['E_el_in', 'E_el_out', 'Q_charged', 'Q_discharged', 'E_D', 'E_L', 'Q_loss',
+                                'cost', 'revenue', 'hours_charging', 'hours_discharging', 'hours_unsolved'], 0.0)
+        if out is not None and os.path.exists(out):
+            os.remove(out)
+
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            bins = self.bins(chunk['Tenv'])
+            self.solve_bins(bins)
+            modes = self.schedule(chunk)
+            price = chunk['price'].to_numpy(dtype=float) if 'price' in chunk.columns else np.zeros(len(chunk))
+
+            # state of charge, electrical power consumed and heat stored per row
+            hourly = np.zeros((len(chunk), 3))
+            retained = (1 - self.loss) ** dt
+            for i, (b, mode) in enumerate(zip(bins, modes)):
+                lost = self.soc * (1 - retained)
+                self.soc -= lost
+                totals['Q_loss'] += lost
+                row = self.table[round(float(b), 6)]
+                if mode != 0 and row is None:
+                    totals['hours_unsolved'] += dt
+                if mode == 0 or row is None:
+                    hourly[i, 0] = self.soc
+                    continue
+
+                suffix = 'char' if mode == 1 else 'dis'
+                Q = row[f"Q_sto ({suffix})"] / 1e3 * dt
+                # share of the step the battery can run before it is full or empty
+                share = min(1.0, (self.capacity - self.soc if mode == 1 else self.soc) / Q) if Q > 0 else 0.0
+                Q *= share
+                P = row[f"P_el ({suffix})"] / 1e3 * dt * share
+                self.soc += mode * Q
+                totals['E_D'] += row[f"E_D total ({suffix})"] / 1e3 * dt * share
+                totals['E_L'] += row[f"E_L total ({suffix})"] / 1e3 * dt * share
+                if mode == 1:
+                    totals['E_el_in'] += P
+                    totals['Q_charged'] += Q
+                    totals['cost'] += P * price[i]
+                    totals['hours_charging'] += dt * share
+                else:
+                    totals['E_el_out'] += P
+                    totals['Q_discharged'] += Q
+                    totals['revenue'] += P * price[i]
+                    totals['hours_discharging'] += dt * share
+                hourly[i] = self.soc, mode * P, mode * Q
+
+            if out is not None:
+                result = chunk.assign(bin=bins, mode=modes, soc=hourly[:, 0], P_el=hourly[:, 1], Q_sto=hourly[:, 2])
+                result.to_csv(out, mode='a', header=not os.path.exists(out), index=False)
+
+        totals['RTE'] = totals['E_el_out'] / totals['E_el_in'] if totals['E_el_in'] else np.nan
+        totals['soc'] = self.soc
+        return totals
@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from sweep import solve_tables
+from system import MODES, load_model, model_name
+
+
+@dataclass
+class BatteryResult:
+    """
+    Combined charging and discharging result of one set of boundary conditions.
+
+    Efficiencies are in %, heat flows and powers in W. The round-trip efficiency
+    is the power-to-power ratio for discharging the heat stored while charging,
+    ``RTE = COP * eta``. The combined exergy efficiency chains both modes,
+    ``eps = eps_char * eps_dis / 100``.
+    """
+    model: str
+    Tsto_in: float
+    Tsto_out: float
+    Tenv: float
+    COP: float
+    eta: float
+    RTE: float
+    eps_char: float
+    eps_dis: float
+    eps: float
+    Q_sto_char: float
+    Q_sto_dis: float
+    P_char: float
+    P_dis: float
+    converged: bool
+    params: dict = field(default_factory=dict)
+    tables: dict = field(default_factory=dict, repr=False)
+
+
+def _solve_mode(job):
+    model, mode, boundary, pamb, Tamb, cache, params = job
+    return solve_tables(model, mode, pamb=pamb, Tamb=Tamb, cache=cache, params=params, **boundary)
+
+
+class CarnotBattery:
+    """
+    Evaluate charging and discharging of a model together.
+
+    Both modes are solved concurrently in two worker processes, which are kept alive
+    between evaluations. Use the battery as context manager or call ``close``.
+
+    Args:
+        model (str): One of MODELS.
+        pamb (float, optional): Ambient pressure for the exergy analysis in bar.
+        Tamb (float, optional): Dead state temperature in °C. Default is 10.
+        cache (ResultCache, optional): Read solved modes from, and store them in, this cache.
+        concurrent (bool, optional): Solve the modes in parallel. Default True.
+    """
+
+    def __init__(self, model, pamb=1, Tamb=10, cache=None, concurrent=True):
+        self.model = model_name(model)
+        load_model(self.model)
+        self.pamb = pamb
+        self.Tamb = Tamb
+        self.cache = cache
+        self.concurrent = concurrent
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def evaluate(self, Tsto_in, Tsto_out, Tenv, params=None):
+        """
+        Solve both modes for one set of boundary conditions.
+
+        Args:
+            Tsto_in, Tsto_out, Tenv (float): Boundary temperatures in °C.
+            params (dict, optional): Component/connection parameters, see ``system.set_params``.
+
+        Returns:
+            BatteryResult: KPIs of both modes and the round trip, the result tables
+            of both modes are in ``tables``.
+        """
+        boundary = {'Tsto_in': Tsto_in, 'Tsto_out': Tsto_out, 'Tenv': Tenv}
+        jobs = [(self.model, mode, boundary, self.pamb, self.Tamb, self.cache, params) for mode in MODES]
+        if self.concurrent:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=len(MODES))
+            tables = dict(zip(MODES, self._pool.map(_solve_mode, jobs)))
+        else:
+            tables = dict(zip(MODES, map(_solve_mode, jobs)))
+
+        # a mode that did not converge only has its solver statistics, its KPIs are NaN
+        nan = float('nan')
+        char, dis = tables['charging']['record'], tables['discharging']['record']
+        return BatteryResult(
+            model=self.model, **boundary,
+            COP=char.get('COP', nan), eta=dis.get('eta', nan), RTE=char.get('COP', nan) * dis.get('eta', nan),
+            eps_char=char['eps'], eps_dis=dis['eps'], eps=char['eps'] * dis['eps'] / 100,
+            Q_sto_char=char.get('Q_sto', nan), Q_sto_dis=dis.get('Q_sto', nan), P_char=char.get('P_el', nan),
+            P_dis=dis.get('P_el', nan),
+            converged=char['converged'] and dis['converged'],
+            params=dict(params or {}), tables=tables)
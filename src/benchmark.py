@@ -0,0 +1,237 @@
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import CoolProp
+from CoolProp.CoolProp import PropsSI as PSI
+import numpy as np
+
+from pinch import BACKENDS, temperature_hp
+from sweep import exergy_analysis
+from system import MODELS, MODES, ModelSystem
+
+# Pressure [bar] and temperature [°C] ranges the fluids see in the models
+FLUID_RANGES = {
+    'R32': ((5, 35), (-5, 110)),
+    'R245fa': ((1, 10), (15, 190)),
+    'water': ((1, 30), (5, 200)),
+    'Nitrogen': ((15, 110), (-20, 450)),
+    'air': ((1, 30), (-20, 450)),
+}
+
+# Reproducible model scenarios: every model and mode at these (Tsto_in, Tsto_out, Tenv)
+SCENARIO_POINTS = [(75, 175, 10), (75, 185, 10), (75, 180, 5), (75, 180, 15)]
+
+
+def benchmark_backends(fluids=None, n=10000, repeat=3):
+    """
+    Compare the tabular CoolProp backends against HEOS for T(h, p) evaluations.
+
+    The sample points are random (p, T) states within ``FLUID_RANGES``, their
+    enthalpy is taken from HEOS so every backend inverts the same (h, p) pairs.
+
+    Args:
+        fluids (list, optional): Fluids to benchmark, default all of FLUID_RANGES.
+        n (int, optional): Number of (h, p) states per fluid. Default is 10000.
+        repeat (int, optional): Timed repetitions, the best one is reported.
+
+    Returns:
+        list: One dict per fluid and backend with the evaluation time, the speedup
+        against HEOS, the one-time table build time, the max. temperature error in K
+        and the number of states the backend failed on.
+    """
+    rng = np.random.default_rng(0)
+    rows = []
+    for fluid in fluids or FLUID_RANGES:
+        (p_min, p_max), (T_min, T_max) = FLUID_RANGES[fluid]
+        p = rng.uniform(p_min, p_max, n) * 1e5
+        T = rng.uniform(T_min, T_max, n) + 273.15
+        h = PSI('H', 'T', T, 'P', p, 'HEOS::' + fluid)
+
+        reference = None
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            state = CoolProp.AbstractState(backend, fluid)
+            build = time.perf_counter() - start
+
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                T_calc = temperature_hp(state, h, p)
+                timings.append(time.perf_counter() - start)
+            if reference is None:
+                reference = (min(timings), T_calc)
+            # NaN marks the states a backend cannot evaluate
+            valid = np.isfinite(T_calc) & np.isfinite(reference[1])
+            rows.append({
+                'fluid': fluid,
+                'backend': backend,
+                'time': min(timings),
+                'speedup': reference[0] / min(timings),
+                'build_time': build,
+                'max_error': float(np.abs(T_calc - reference[1])[valid].max()) if valid.any() else float('nan'),
+                'failed': int(n - valid.sum()),
+            })
+    return rows
+
+
+def run_scenario(model, mode, Tsto_in, Tsto_out, Tenv):
+    """
+    Build, solve and analyse one scenario and time each stage.
+
+    Returns:
+        dict: Wall time of build, solve and exergy analysis in s, the number of
+        Newton iterations, the final residual and the convergence flag. TESPy skips
+        the postprocessing of a solve that did not converge, it is not analysed and
+        its exergy time is None.
+    """
+    start = time.perf_counter()
+    system = ModelSystem(model, mode, Tsto_in=Tsto_in, Tsto_out=Tsto_out, Tenv=Tenv)
+    built = time.perf_counter()
+    converged = system.solve()
+    solved = time.perf_counter()
+    exergy = None
+    if converged:
+        exergy_analysis(system.network, system.ep, system.ef, system.el, pamb=1, Tamb=10)
+        exergy = time.perf_counter() - solved
+    history = getattr(system.network, 'residual_history', [])
+    return {
+        'build': built - start,
+        'solve': solved - built,
+        'exergy': exergy,
+        'iterations': system.network.iter + 1,
+        'residual': float(history[-1]) if len(history) else None,
+        'converged': converged,
+    }
+
+
+def benchmark_models(models=MODELS, modes=MODES, points=SCENARIO_POINTS, repeat=3):
+    """
+    Benchmark the solve time, convergence and exergy analysis cost of the models.
+
+    Timings are the median over ``repeat`` runs. Peak memory is measured in a
+    separate run with tracemalloc, so its overhead does not distort the timings.
+
+    Returns:
+        list: One dict per model, mode and point. ``exergy`` and ``total`` are None
+        for scenarios that did not converge, their build and solve times are kept.
+    """
+    rows = []
+    for model in models:
+        for mode in modes:
+            for Tsto_in, Tsto_out, Tenv in points:
+                runs = [run_scenario(model, mode, Tsto_in, Tsto_out, Tenv) for _ in range(repeat)]
+                tracemalloc.start()
+                run_scenario(model, mode, Tsto_in, Tsto_out, Tenv)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                row = {'model': model, 'mode': mode, 'Tsto_in': Tsto_in, 'Tsto_out': Tsto_out, 'Tenv': Tenv}
+                row.update({stage: statistics.median(run[stage] for run in runs) for stage in ('build', 'solve')})
+                row.update({key: runs[-1][key] for key in ('iterations', 'residual', 'converged')})
+                # only runs that converged were analysed, the total of a failed scenario is not comparable
+                analysed = [run['exergy'] for run in runs if run['exergy'] is not None]
+                row['exergy'] = statistics.median(analysed) if row['converged'] and analysed else None
+                row['total'] = None if row['exergy'] is None else row['build'] + row['solve'] + row['exergy']
+                row['peak_memory'] = peak
+                rows.append(row)
+    return rows
+
+
+def environment():
+    """Versions and machine information stored alongside benchmark results."""
+    import tespy
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'tespy': tespy.__version__,
+        'CoolProp': CoolProp.__version__,
+    }
+
+
+def compare(baseline, current, threshold=1.2):
+    """
+    Find scenarios that got slower or stopped converging compared to a baseline.
+
+    Times are only compared between scenarios that converged in both runs.
+
+    Args:
+        baseline (dict): Benchmark JSON of the reference run.
+        current (dict): Benchmark JSON of the new run.
+        threshold (float, optional): Allowed ratio of total times. Default is 1.2.
+
+    Returns:
+        list: One dict per regressed scenario.
+    """
+    def key(row):
+        return row['model'], row['mode'], row['Tsto_in'], row['Tsto_out'], row['Tenv']
+
+    reference = {key(row): row for row in baseline['scenarios']}
+    regressions = []
+    for row in current['scenarios']:
+        ref = reference.get(key(row))
+        if ref is None:
+            continue
+        ratio = None if row['total'] is None or ref['total'] is None else row['total'] / ref['total']
+        if (ratio is not None and ratio > threshold) or (ref['converged'] and not row['converged']):
+            regressions.append({'scenario': key(row), 'ratio': ratio,
+                                'iterations': (ref['iterations'], row['iterations']),
+                                'converged': row['converged']})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks of the Carnot battery models.")
+    sub = parser.add_subparsers(dest='suite', required=True)
+    backends = sub.add_parser('backends', help="CoolProp backend speed and accuracy per fluid")
+    backends.add_argument('--fluids', nargs='*', default=None)
+    backends.add_argument('-n', type=int, default=10000)
+    models = sub.add_parser('models', help="Build/solve/exergy time, iterations and memory per model and mode")
+    models.add_argument('--models', nargs='*', default=list(MODELS))
+    models.add_argument('--modes', nargs='*', default=list(MODES))
+    models.add_argument('--repeat', type=int, default=3)
+    models.add_argument('--out', default='benchmark.json')
+    cmp = sub.add_parser('compare', help="Report regressions of a benchmark JSON against a baseline")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.suite == 'backends':
+        print(f"{'fluid':<10}{'backend':<14}{'time [ms]':>11}{'speedup':>9}{'build [s]':>11}{'max dT [K]':>12}{'failed':>8}")
+        for row in benchmark_backends(args.fluids, n=args.n):
+            print(f"{row['fluid']:<10}{row['backend']:<14}{1e3 * row['time']:>11.2f}{row['speedup']:>9.1f}"
+                  f"{row['build_time']:>11.2f}{row['max_error']:>12.2e}{row['failed']:>8}")
+
+    elif args.suite == 'models':
+        rows = benchmark_models(args.models, args.modes, repeat=args.repeat)
+        with open(args.out, 'w') as f:
+            json.dump({'environment': environment(), 'scenarios': rows}, f, indent=2)
+        print(f"{'model':<12}{'mode':<13}{'Tsto_out':>9}{'Tenv':>6}{'build':>8}{'solve':>8}"
+              f"{'exergy':>8}{'iter':>6}{'residual':>10}{'peak MB':>9}")
+        for row in rows:
+            residual = f"{row['residual']:>10.1e}" if row['residual'] is not None else f"{'-':>10}"
+            exergy = f"{row['exergy']:>8.3f}" if row['exergy'] is not None else f"{'-':>8}"
+            print(f"{row['model']:<12}{row['mode']:<13}{row['Tsto_out']:>9}{row['Tenv']:>6}"
+                  f"{row['build']:>8.3f}{row['solve']:>8.3f}{exergy}{row['iterations']:>6}"
+                  f"{residual}{row['peak_memory'] / 2 ** 20:>9.1f}")
+
+    elif args.suite == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, threshold=args.threshold)
+        for reg in regressions:
+            slower = f"{reg['ratio']:.2f}x slower" if reg['ratio'] is not None else 'time not comparable'
+            print(f"{reg['scenario']}: {slower}, iterations {reg['iterations']}, converged={reg['converged']}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
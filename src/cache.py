@@ -0,0 +1,164 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+import topology
+from exergy import exergy_record
+from hx_sizing import size_heat_exchangers
+from pinch import hx_streams
+from system import canonical, load_model, model_name
+
+DEFAULT_PATH = os.environ.get('CARNOT_CACHE', '.result_cache.sqlite')
+# Layout of the tables built by result_tables, part of every key so older entries are not read
+TABLES_VERSION = 5
+
+
+def model_hash(model):
+    """Hash of a model's topology spec, its source file and the builder, changes with any of them."""
+    module = load_model(model)
+    digest = hashlib.sha256(json.dumps(getattr(module, 'SPEC', None), sort_keys=True).encode())
+    for source in (module, topology):
+        with open(inspect.getsourcefile(source), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def result_tables(network, ean, record):
+    """
+    Collect everything needed to re-plot or tabulate a solved network without it.
+
+    Args:
+        network (Network): Solved network.
+        ean (ExergyAnalysis): Exergy analysis of the network.
+        record (dict): Scalar results of the solve.
+
+    Returns:
+        dict: ``record``, TESPy ``results`` tables, ``exergy`` tables with the
+        fixed-width ``exergy.exergy_record`` of the analysis, fluprodia
+        ``plotting`` data per component, the inlet/outlet connection labels of every
+        component (``ports``), the heat exchanger ``streams`` for ``pinch_analysis``
+        and their segment-wise ``sizing`` (see ``hx_sizing.size_heat_exchangers``).
+    """
+    streams = hx_streams(network)
+    return {
+        'record': record,
+        'results': {key: df.copy() for key, df in network.results.items()},
+        'exergy': {'network': ean.network_data.copy(),
+                   'components': ean.component_data.copy(),
+                   'connections': ean.connection_data.copy(),
+                   'busses': ean.bus_data.copy(),
+                   'record': exergy_record(ean)},
+        'plotting': {comp.label: comp.get_plotting_data() for comp in network.comps['object']
+                     if comp.get_plotting_data() is not None},
+        'ports': {comp.label: {'inlets': [c.label for c in comp.inl], 'outlets': [c.label for c in comp.outl]}
+                  for comp in network.comps['object']},
+        'streams': streams,
+        'sizing': size_heat_exchangers(network.results['Connection'], streams),
+    }
+
+
+class ResultCache:
+    """
+    Content-addressed SQLite store of solved model results with LRU eviction.
+
+    Entries are keyed on the model source hash, mode, boundary temperatures and
+    optional parameters, so editing a model file invalidates its entries.
+
+    Args:
+        path (str, optional): SQLite file, default ``$CARNOT_CACHE`` or '.result_cache.sqlite'.
+        max_bytes (int, optional): Size limit of the stored results. Default is 512 MB.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=512 * 2 ** 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._db = None
+        self._hashes = {}
+
+    def __getstate__(self):
+        # the sqlite handle stays in its process, workers open their own
+        return {'path': self.path, 'max_bytes': self.max_bytes, '_db': None, '_hashes': {}}
+
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, model TEXT, model_hash TEXT, '
+                'size INTEGER, last_access REAL, value BLOB)')
+        return self._db
+
+    def model_hash(self, model):
+        """Hash of the model source, purging entries of older versions on first use."""
+        model = model_name(model)
+        if model not in self._hashes:
+            self._hashes[model] = model_hash(model)
+            self.invalidate(model)
+        return self._hashes[model]
+
+    def key(self, model, mode, boundary, params=None):
+        """
+        Content hash of one solve.
+
+        Args:
+            model (str): Model name.
+            mode (str): 'charging' or 'discharging'.
+            boundary (dict): Boundary temperatures and dead state of the solve.
+            params (dict, optional): Additional component/connection parameters.
+        """
+        content = {
+            'model': model_name(model),
+            'tables': TABLES_VERSION,
+            'model_hash': self.model_hash(model),
+            'mode': mode,
+            'boundary': {key: float(value) for key, value in sorted(boundary.items())},
+            'params': {key: canonical(value) for key, value in sorted((params or {}).items())},
+        }
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key):
+        """Return the stored value or None, refreshing its LRU timestamp."""
+        row = self.db.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        with self.db:
+            self.db.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, key, model, value):
+        """Store a value and evict the least recently used entries above ``max_bytes``."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                            (key, model_name(model), self.model_hash(model), len(blob), time.time(), blob))
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the store fits into ``max_bytes``."""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self.db.execute('SELECT key, size FROM results ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        with self.db:
+            self.db.executemany('DELETE FROM results WHERE key = ?', stale)
+
+    def invalidate(self, model):
+        """Delete all entries of a model that were computed from a different source."""
+        with self.db:
+            self.db.execute('DELETE FROM results WHERE model = ? AND model_hash != ?',
+                            (model_name(model), self._hashes.get(model_name(model)) or model_hash(model)))
+
+    def clear(self):
+        """Delete all entries."""
+        with self.db:
+            self.db.execute('DELETE FROM results')
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import CoolProp
+import fluprodia
+from fluprodia import FluidPropertyDiagram
+import numpy as np
+
+DEFAULT_DIR = os.environ.get('CARNOT_DIAGRAMS', '.diagram_cache')
+DEFAULT_UNITS = {'T': '°C', 'p': 'bar', 'h': 'kJ/kg'}
+
+# diagrams already loaded in this process, by content hash
+_DIAGRAMS = {}
+
+
+def diagram_key(fluid, units, isolines):
+    """Content hash of a diagram backdrop: fluid, unit system, isolines and library versions."""
+    content = {
+        'fluid': fluid,
+        'units': dict(sorted(units.items())),
+        'isolines': {key: np.asarray(values, dtype=float).tolist() for key, values in sorted(isolines.items())},
+        'fluprodia': fluprodia.__version__,
+        'CoolProp': CoolProp.__version__,
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def get_diagram(fluid, isolines, units=None, cache_dir=DEFAULT_DIR):
+    """
+    Fluid property diagram with precomputed isolines, calculated once and kept on disk.
+
+    The isoline backdrop only depends on the fluid, the unit system and the isoline
+    values, so it is stored with ``FluidPropertyDiagram.to_json`` under its content
+    hash. Later calls, also from other processes, load it instead of calling
+    ``calc_isolines`` again, leaving only ``calc_individual_isoline`` for the process
+    lines of each case.
+
+    Args:
+        fluid (str): CoolProp fluid name.
+        isolines (dict): Isoline values per property as passed to ``set_isolines``.
+        units (dict, optional): Unit system, default T in °C, p in bar and h in kJ/kg.
+        cache_dir (str, optional): Directory of the stored backdrops, default
+            ``$CARNOT_DIAGRAMS`` or '.diagram_cache'.
+
+    Returns:
+        FluidPropertyDiagram: Diagram ready for ``draw_isolines``.
+    """
+    units = units or DEFAULT_UNITS
+    key = diagram_key(fluid, units, isolines)
+    if key in _DIAGRAMS:
+        return _DIAGRAMS[key]
+
+    path = os.path.join(cache_dir, f"{fluid}-{key[:16]}.json")
+    try:
+        diagram = FluidPropertyDiagram.from_json(path)
+    except (OSError, KeyError, ValueError):
+        diagram = FluidPropertyDiagram(fluid)
+        diagram.set_unit_system(**units)
+        diagram.set_isolines(**isolines)
+        diagram.calc_isolines()
+        # write to a temporary file first, parallel readers never see a partial file
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.json')
+        os.close(fd)
+        diagram.to_json(tmp)
+        os.replace(tmp, path)
+
+    _DIAGRAMS[key] = diagram
+    return diagram
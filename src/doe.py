@@ -0,0 +1,181 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from sweep import run_sweep
+from system import check_params
+
+# Outputs of a sweep record the sensitivity indices are computed for
+OUTPUTS = ('COP', 'eta', 'eps_char', 'eps_dis')
+
+
+def full_factorial(levels):
+    """
+    Full-factorial design over arbitrary parameters.
+
+    Args:
+        levels (dict): Values per parameter, e.g. ``{'Tsto_out': [175, 185], 'Compressor.eta_s': [0.8, 0.9]}``.
+
+    Returns:
+        list: One dict per combination, ordered like ``itertools.product``.
+    """
+    names = list(levels)
+    return [dict(zip(names, values)) for values in itertools.product(*levels.values())]
+
+
+def unit_samples(n, d, method='lhs', seed=None):
+    """
+    Space-filling samples in the unit hypercube.
+
+    Args:
+        n (int): Number of samples.
+        d (int): Number of dimensions.
+        method (str, optional): 'lhs' (Latin hypercube) or 'sobol' (scrambled Sobol
+            sequence, needs scipy, n should be a power of two).
+        seed (int, optional): Seed of the random generator.
+
+    Returns:
+        np.ndarray: Samples of shape (n, d).
+    """
+    if method == 'sobol':
+        from scipy.stats import qmc
+        return qmc.Sobol(d, scramble=True, seed=seed).random(n)
+    if method != 'lhs':
+        raise ValueError(f"Unknown sampling method '{method}', choose from 'lhs', 'sobol'.")
+    rng = np.random.default_rng(seed)
+    # one sample per stratum and dimension, strata paired by independent permutations
+    strata = np.argsort(rng.random((d, n)), axis=1).T
+    return (strata + rng.random((n, d))) / n
+
+
+def scale(samples, bounds):
+    """Map unit samples to the parameter bounds and return them as list of dicts."""
+    lower, upper = np.array(list(bounds.values()), dtype=float).T
+    values = lower + samples * (upper - lower)
+    return [dict(zip(bounds, row.tolist())) for row in values]
+
+
+def latin_hypercube(bounds, n, seed=None):
+    """
+    Latin-hypercube design.
+
+    Args:
+        bounds (dict): (lower, upper) bound per parameter.
+        n (int): Number of samples.
+        seed (int, optional): Seed of the random generator.
+
+    Returns:
+        list: One dict per sample.
+    """
+    return scale(unit_samples(n, len(bounds), 'lhs', seed), bounds)
+
+
+def sobol(bounds, n, seed=None):
+    """Scrambled Sobol design, see ``latin_hypercube`` for the arguments."""
+    return scale(unit_samples(n, len(bounds), 'sobol', seed), bounds)
+
+
+def saltelli(bounds, n, method='sobol', seed=None):
+    """
+    Sample design for the estimation of Sobol sensitivity indices.
+
+    Two independent base matrices A and B are drawn, AB_i is A with column i taken
+    from B. The design holds the rows of A, B and all AB_i, n * (d + 2) points.
+
+    Args:
+        bounds (dict): (lower, upper) bound per parameter.
+        n (int): Number of base samples.
+        method (str, optional): Sampling of the base matrices, see ``unit_samples``.
+        seed (int, optional): Seed of the random generator.
+
+    Returns:
+        list: One dict per sample in the order A, B, AB_1 ... AB_d.
+    """
+    d = len(bounds)
+    base = unit_samples(n, 2 * d, method, seed)
+    A, B = base[:, :d], base[:, d:]
+    blocks = [A, B]
+    for i in range(d):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    return scale(np.vstack(blocks), bounds)
+
+
+def sobol_indices(y, d):
+    """
+    First-order (Saltelli 2010) and total (Jansen) Sobol indices of one output.
+
+    Args:
+        y (np.ndarray): Output at the points of ``saltelli``, n * (d + 2) values.
+            Unconverged points may be NaN, they are left out of the estimates.
+        d (int): Number of parameters.
+
+    Returns:
+        tuple: First-order and total indices, arrays of length d.
+    """
+    y = np.asarray(y, dtype=float).reshape(d + 2, -1)
+    f_A, f_B, f_AB = y[0], y[1], y[2:]
+    variance = np.nanvar(np.concatenate([f_A, f_B]))
+    first = np.nanmean(f_B * (f_AB - f_A), axis=1) / variance
+    total = 0.5 * np.nanmean((f_A - f_AB) ** 2, axis=1) / variance
+    return first, total
+
+
+def run_design(model, samples, batch_size=None, **kwargs):
+    """
+    Solve a design in batches.
+
+    Every sample must hold ``Tsto_in``, ``Tsto_out`` and ``Tenv``, the other keys
+    are component/connection parameters such as 'Compressor.eta_s' or 'c2.p', see
+    ``system.check_params``.
+
+    Args:
+        model (str): One of MODELS.
+        samples (list): Design points, e.g. from ``latin_hypercube``.
+        batch_size (int, optional): Points per call of ``run_sweep``, default all at once.
+            Batches share the ``checkpoint``, a ``store`` can only be written unbatched.
+        **kwargs: Passed on to ``run_sweep`` (workers, cache, checkpoint, ...).
+
+    Returns:
+        pd.DataFrame: One row per sample, in sample order.
+    """
+    check_params(model, samples[0])
+    batch_size = batch_size or len(samples)
+    if batch_size < len(samples) and kwargs.get('store') is not None:
+        raise ValueError("A results store can only be written for an unbatched design.")
+    batches = [run_sweep(model, samples[start:start + batch_size], **kwargs)
+               for start in range(0, len(samples), batch_size)]
+    df = pd.concat(batches, ignore_index=True)
+    df['Iteration'] = range(len(df))
+    return df
+
+
+def sensitivity(model, bounds, n, fixed=None, outputs=OUTPUTS, method='sobol', seed=None, **kwargs):
+    """
+    Global Sobol sensitivity indices of the model outputs.
+
+    Args:
+        model (str): One of MODELS.
+        bounds (dict): (lower, upper) bound per varied parameter.
+        n (int): Number of base samples, the model is solved n * (d + 2) times.
+        fixed (dict, optional): Values of the boundary temperatures that are not varied.
+        outputs (tuple, optional): Record columns to analyse, default OUTPUTS.
+        method (str, optional): Sampling of the base matrices, 'sobol' or 'lhs'.
+        seed (int, optional): Seed of the random generator.
+        **kwargs: Passed on to ``run_design``.
+
+    Returns:
+        tuple: DataFrame of the indices with columns output, parameter, S1 and ST,
+        and the DataFrame of all solved samples.
+    """
+    samples = [dict(fixed or {}, **sample) for sample in saltelli(bounds, n, method, seed)]
+    df = run_design(model, samples, **kwargs)
+    rows = []
+    for output in outputs:
+        first, total = sobol_indices(df[output].where(df['converged (char)'] & df['converged (dis)']),
+                                     len(bounds))
+        rows += [{'output': output, 'parameter': name, 'S1': s1, 'ST': st}
+                 for name, s1, st in zip(bounds, first, total)]
+    return pd.DataFrame(rows), df
@@ -0,0 +1,134 @@
+import numpy as np
+
+from results_store import ResultsStore
+
+# Per-item fields of an exergy record, items are the components followed by the bus conversions
+ITEM_FIELDS = ('E_F', 'E_P', 'E_D', 'y_D')
+# Network totals of an exergy record
+TOTAL_FIELDS = ('E_F_total', 'E_P_total', 'E_D_total', 'E_L_total', 'epsilon')
+
+
+def record_dtype(k):
+    """Structured dtype of an exergy record with ``k`` components and bus conversions."""
+    return np.dtype([(name, 'f8', (k,)) for name in ITEM_FIELDS] + [(name, 'f8') for name in TOTAL_FIELDS])
+
+
+def exergy_record(ean):
+    """
+    Reduce an exergy analysis to a fixed-width record.
+
+    Args:
+        ean (ExergyAnalysis): Analysed network.
+
+    Returns:
+        tuple: Item labels (component labels and '<component> (bus)') and a
+        structured scalar of ``record_dtype`` with E_F, E_P, E_D and y_D per item
+        and the network totals.
+    """
+    busses = ean.bus_data.rename(index=lambda label: f"{label} (bus)")
+    labels = list(ean.component_data.index) + list(busses.index)
+    record = np.zeros((), dtype=record_dtype(len(labels)))
+    for name, column in zip(ITEM_FIELDS, ('E_F', 'E_P', 'E_D', 'y_Dk')):
+        record[name] = np.concatenate([ean.component_data[column].to_numpy(float),
+                                       busses[column].to_numpy(float)])
+    for name in ('E_F', 'E_P', 'E_D', 'E_L'):
+        record[f"{name}_total"] = ean.network_data[name]
+    record['epsilon'] = ean.network_data['epsilon']
+    return labels, record
+
+
+def stack(records):
+    """
+    Stack exergy records of many solves of the same model and mode.
+
+    Args:
+        records (list): (labels, record) tuples as returned by ``exergy_record``.
+
+    Returns:
+        tuple: Item labels and an array of shape (n,), ``array['E_D']`` is (n, k).
+    """
+    labels = records[0][0]
+    if any(other != labels for other, _ in records):
+        raise ValueError("Exergy records of different networks cannot be stacked.")
+    return labels, np.stack([record for _, record in records])
+
+
+def from_store(store, mode):
+    """
+    Build the stacked exergy records of a sweep from its results store.
+
+    Args:
+        store (str or ResultsStore): Store written by ``run_sweep``.
+        mode (str): 'charging' or 'discharging'.
+
+    Returns:
+        tuple: Item labels and an array of ``record_dtype``, one entry per sweep point
+        in ``Iteration`` order. Points that did not converge are NaN, without any
+        converged point of the mode there are no items.
+    """
+    if isinstance(store, str):
+        store = ResultsStore(store)
+    suffix = 'char' if mode == 'charging' else 'dis'
+    points = store.points().set_index('Iteration').sort_index()
+    components = store.components(mode=mode)
+    if 'E_D' not in components.columns or components['E_D'].isna().all():
+        # no converged point of this mode, an empty record of NaN totals per point
+        array = np.zeros(len(points), dtype=record_dtype(0))
+        for name in TOTAL_FIELDS:
+            array[name] = np.nan
+        return [], array
+    components = components.dropna(subset=['E_D'])
+    table = components.pivot(index='Iteration', columns='component',
+                             values=list(ITEM_FIELDS)).reindex(points.index)
+    labels = list(table['E_D'].columns)
+
+    array = np.zeros(len(points), dtype=record_dtype(len(labels)))
+    for name in ITEM_FIELDS:
+        array[name] = table[name][labels].to_numpy(float)
+    for name in ('E_F', 'E_P', 'E_D', 'E_L'):
+        array[f"{name}_total"] = points[f"{name} total ({suffix})"].to_numpy(float)
+    array['epsilon'] = points[f"eps_{suffix}"].to_numpy(float) / 100
+    return labels, array
+
+
+def grassmann(array, labels):
+    """
+    Grassmann breakdown of the fuel exergy of every point.
+
+    Returns:
+        dict: Shares of the fuel exergy in ``E_P``, ``E_L`` and per item ``E_D``
+        (shape (n, k)); per point they add up to one.
+    """
+    E_F = array['E_F_total'][:, None]
+    return {
+        'labels': labels,
+        'E_P': array['E_P_total'] / array['E_F_total'],
+        'E_L': array['E_L_total'] / array['E_F_total'],
+        'E_D': array['E_D'] / E_F,
+    }
+
+
+def ranking(array, labels, field='E_D'):
+    """
+    Rank the components of every point by an item field, largest first.
+
+    Args:
+        array (np.ndarray): Stacked exergy records.
+        labels (list): Item labels of the records.
+        field (str, optional): One of ITEM_FIELDS. Default is 'E_D'.
+
+    Returns:
+        dict: ``order`` (n, k) item indices per point, ``labels`` of the items,
+        ``mean_rank`` (k,) over all points (1 is largest) and ``top`` (k,), how often
+        each item ranked first.
+    """
+    values = np.nan_to_num(array[field], nan=-np.inf)
+    order = np.argsort(-values, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, order.shape[1] + 1)[None, :], axis=1)
+    return {
+        'order': order,
+        'labels': np.asarray(labels),
+        'mean_rank': ranks.mean(axis=0),
+        'top': np.bincount(order[:, 0], minlength=len(labels)),
+    }
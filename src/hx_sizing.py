@@ -0,0 +1,69 @@
+import numpy as np
+
+from pinch import pinch_analysis
+
+SEGMENT_DTYPE = np.dtype([('Q', 'f8'), ('dQ', 'f8'), ('LMTD', 'f8'), ('UA', 'f8')])
+SIZING_DTYPE = np.dtype([('component', 'U64'), ('Q', 'f8'), ('UA', 'f8'), ('LMTD', 'f8'), ('dT_min', 'f8')])
+
+
+def lmtd(dT_a, dT_b):
+    """Logarithmic mean temperature difference, the arithmetic mean where both ends are equal."""
+    dT_a, dT_b = np.asarray(dT_a, dtype=float), np.asarray(dT_b, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_mean = (dT_a - dT_b) / np.log(dT_a / dT_b)
+    return np.where(np.isclose(dT_a, dT_b), 0.5 * (dT_a + dT_b), log_mean)
+
+
+def size_heat_exchangers(df, streams, step_number=50, backend='HEOS'):
+    """
+    Segment-wise UA and LMTD of heat exchangers along their enthalpy profiles.
+
+    Every heat exchanger is discretized into ``step_number`` segments of equal
+    cold side enthalpy change with ``pinch.pinch_analysis``; each segment gets the
+    LMTD of its end temperature differences and ``UA = dQ / LMTD``. Phase changes
+    are resolved by the segments, unlike a single LMTD over the terminal temperatures.
+
+    Args:
+        df (pd.DataFrame): Connection results with columns 'T', 'p', 'h', 'm' and the fluids.
+        streams (dict): Heat exchanger streams as returned by ``pinch.hx_streams``.
+        step_number (int, optional): Number of segments. Default is 50.
+        backend (str, optional): CoolProp backend, see ``pinch.BACKENDS``.
+
+    Returns:
+        dict: ``summary`` structured array with Q [kW], UA [W/K], the effective
+        LMTD = Q / UA [K] and the minimum temperature difference per heat exchanger;
+        ``segments``, one structured array of Q, dQ [kW], LMTD [K] and UA [W/K] per
+        heat exchanger.
+    """
+    result = pinch_analysis(df, **streams, step_number=step_number, backend=backend)
+    summary = np.zeros(len(result['profiles']), dtype=SIZING_DTYPE)
+    segments = []
+    for i, profile in enumerate(result['profiles']):
+        segment = np.zeros(step_number, dtype=SEGMENT_DTYPE)
+        segment['Q'] = profile['Q'][1:]
+        segment['dQ'] = np.diff(profile['Q'])
+        segment['LMTD'] = lmtd(profile['dT'][:-1], profile['dT'][1:])
+        segment['UA'] = 1e3 * segment['dQ'] / segment['LMTD']
+        segments.append(segment)
+
+        UA = segment['UA'].sum()
+        Q = profile['Q'][-1]
+        summary[i] = (result['summary']['component'][i], Q, UA, 1e3 * Q / UA, result['summary']['dT_min'][i])
+    return {'summary': summary, 'segments': segments}
+
+
+def area(sizing, U, component=None):
+    """
+    Heat transfer area in m² from the sized UA.
+
+    Args:
+        sizing (dict): Output of ``size_heat_exchangers``.
+        U (float or dict): Overall heat transfer coefficient in W/m²K, or one per component.
+        component (str, optional): Return the area of this heat exchanger only.
+
+    Returns:
+        dict or float: Area per component, or of ``component``.
+    """
+    areas = {row['component']: row['UA'] / (U[row['component']] if isinstance(U, dict) else U)
+             for row in sizing['summary']}
+    return areas if component is None else areas[component]
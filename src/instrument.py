@@ -0,0 +1,145 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+# Network methods timed as solver phases, the rest of a solve (network check,
+# initialisation, determination of the variables) counts as preprocessing
+PHASES = {'solve_loop': 'newton', 'postprocessing': 'postprocessing'}
+
+# Callbacks receiving every solve event of this process
+HOOKS = []
+
+# JSON lines file every solve is logged to, also from worker processes
+LOG_PATH = os.environ.get('CARNOT_SOLVE_LOG')
+
+
+def add_hook(callback):
+    """Register a callback receiving the event dict of every solve."""
+    HOOKS.append(callback)
+    return callback
+
+
+def remove_hook(callback):
+    """Unregister a callback added with ``add_hook``."""
+    HOOKS.remove(callback)
+
+
+class JsonlSink:
+    """
+    Hook appending solve events to a JSON lines file.
+
+    Every event is written with a single call, so several processes can log to the
+    same file.
+
+    Args:
+        path (str): Log file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    def __call__(self, event):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(event, default=float) + '\n')
+
+
+def status(network):
+    """Convergence status of a solved network."""
+    if getattr(network, 'lin_dep', False):
+        return 'singular'
+    if not getattr(network, 'progress', True):
+        return 'no_progress'
+    if network.converged:
+        return 'converged'
+    if network.iter >= network.max_iter - 1:
+        return 'max_iter'
+    return 'not_converged'
+
+
+def _timed(method, phase, timings):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[phase] += time.perf_counter() - start
+    return wrapper
+
+
+def solve(network, mode='design', context=None, **kwargs):
+    """
+    Solve a network and emit an event with its convergence diagnostics.
+
+    Without hooks and ``CARNOT_SOLVE_LOG`` the network is solved as is.
+
+    Args:
+        network (Network): Network to solve.
+        mode (str, optional): 'design' or 'offdesign'.
+        context (dict, optional): Added to the event, e.g. model, mode and boundary conditions.
+        **kwargs: Passed on to ``Network.solve``.
+
+    Returns:
+        dict: The event, ``None`` without hooks. It holds the context, ``solve_mode``,
+        ``status`` (see ``status``, 'error' if the solver raised), ``converged``,
+        ``iterations``, the residual norm per iteration, the wall time and its split
+        into ``preprocessing``, ``newton`` and ``postprocessing`` in s and the error message.
+    """
+    if not HOOKS and LOG_PATH is None:
+        network.solve(mode=mode, **kwargs)
+        return None
+
+    timings = {phase: 0.0 for phase in PHASES.values()}
+    for name, phase in PHASES.items():
+        setattr(network, name, _timed(getattr(network, name), phase, timings))
+    network.residual_history = []
+    error = None
+    start = time.perf_counter()
+    try:
+        network.solve(mode=mode, **kwargs)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        # drop the instance wrappers, the class methods are visible again
+        for name in PHASES:
+            delattr(network, name)
+        residuals = [float(value) for value in getattr(network, 'residual_history', [])]
+        event = dict(context or {}, timestamp=time.time(), pid=os.getpid(), solve_mode=mode,
+                     init_path=kwargs.get('init_path'), status='error' if error else status(network),
+                     converged=bool(getattr(network, 'converged', False)), iterations=len(residuals),
+                     residuals=residuals,
+                     wall=wall, preprocessing=wall - sum(timings.values()), **timings,
+                     error=None if error is None else f"{type(error).__name__}: {error}")
+        emit(event)
+    return event
+
+
+def emit(event):
+    """Pass an event to all hooks and the log file."""
+    for hook in HOOKS:
+        hook(event)
+    if LOG_PATH is not None:
+        JsonlSink(LOG_PATH)(event)
+
+
+def read_events(path):
+    """
+    Read a solve log into a DataFrame.
+
+    A line cut off by a crash is skipped.
+
+    Returns:
+        pd.DataFrame: One row per solve, ``residuals`` holds lists.
+    """
+    events = []
+    with open(path) as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return pd.DataFrame(events)
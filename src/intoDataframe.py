@@ -1,25 +1,17 @@
 # --------- Temperature Storage out to HP ----------------
-from tespy.tools import ExergyAnalysis
-import pandas as pd
+from cache import ResultCache
+from retry import RetryLadder
+from sweep import make_grid, run_sweep
 
-Tsto_out = [175, 180, 185, 190]
-data_model1_ihx_tstoOut = []
-# Iterate over each ambient temperature
-for idx, temp in enumerate(Tsto_out):
-    # ------------- charging --------------
-    nw_char = Network(p_unit='bar', T_unit='C', h_unit='kJ / kg')
-    network_char, cd, hx1, hx2, cp, ep_hp, ef_hp, el_hp = create_connections_charg(network=nw_char, charging_mode=True, Tsto_in=75, Tsto_out=temp, Tenv=10)
-    COP = abs(cd.Q.val+hx1.Q.val+hx2.Q.val) / cp.P.val
-    ean_char = ExergyAnalysis(network=network_char, E_P=[ep_hp], E_F=[ef_hp], E_L=[el_hp])
-    ean_char.analyse(pamb=1, Tamb=10)
-    eps_char = 100*ean_char.network_data.epsilon
-    # ------- Discharging -----------------
-    nw_dis = Network(p_unit='bar', T_unit='C', h_unit='kJ / kg')
-    network_dis, gen, ph, ev, sh, ef_orc, el_orc = create_connections_discharge(network=nw_dis, charging_mode=False, Tsto_in=75, Tsto_out=temp, Tenv=10)
-    eta = 100*(gen.P.val/(ph.Q.val+ev.Q.val+sh.Q.val))
-    ean_dis = ExergyAnalysis(network=network_dis, E_P=[gen], E_F=[ef_orc], E_L=[el_orc])
-    ean_dis.analyse(pamb=1, Tamb=10)
-    eps_dis = 100*ean_dis.network_data.epsilon
-    data_model1_ihx_tstoOut.append([idx, temp, COP, eta, eps_char, eps_dis, network_char, network_dis, ean_char, ean_dis])
-
-data_model1_ihx_tstoOut = pd.DataFrame(data_model1_ihx_tstoOut, columns=["Iteration", "Tsto_out", "COP", "eta", "eps_char", "eps_dis", "network_char", "network_dis", "ean_char", "ean_dis"])
+if __name__ == '__main__':
+    # Each grid point solves one charging and one discharging network in a worker process,
+    # points already in the result cache are read instead of solved. Every finished point
+    # is appended to the checkpoint, so an interrupted sweep continues where it stopped.
+    # Scalars, connection states and component KPIs end up in a Parquet store for plotting.
+    # Points that do not converge are retried from converged neighbours, the strategy
+    # that worked is recorded per mode in the 'strategy (char)/(dis)' columns.
+    grid = make_grid(Tsto_in=[75], Tsto_out=[175, 180, 185, 190], Tenv=[10])
+    data_model1_ihx_tstoOut = run_sweep('model1_ihx', grid, cache=ResultCache(),
+                                        store='results/model1_ihx_tstoOut',
+                                        checkpoint='results/model1_ihx_tstoOut.jsonl',
+                                        retry=RetryLadder('results/model1_ihx_stash'))
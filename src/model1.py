@@ -1,134 +1,129 @@
-# unified_model.py
-
-from tespy.components import Compressor, Condenser, HeatExchanger, Pump, Turbine, CycleCloser, Source, Sink, Valve
-from tespy.connections import Connection, Bus
-from tespy.networks import Network
-from tespy.tools import ExergyAnalysis
-import pandas as pd
-
-def create_system(network, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None):
-    # Validate inputs
-    if Tsto_out is None or Tsto_in is None or Tenv is None:
-        raise ValueError("Missing required temperature values.")
-
-    # Common components
-    cp = Compressor('Compressor')
-    cd = Condenser('Condenser')
-    va = Valve('Expansion Valve')
-    ev = HeatExchanger('Evaporator')
-    pc = HeatExchanger('Pre Cooler')
-    sc = HeatExchanger('Sub Cooler')
-    cc = CycleCloser('Cycle Closer')
-    sso = Source('Storage Source')
-    ssi = Sink('Storage Sink')
-    aso = Source('Ambient Source')
-    asi = Sink('Ambient Sink')
-
-    # ORC components
-    p = Pump('Pump')
-    tb = Turbine('Turbine')
-    rc_cd = Condenser('RC Condenser')
-    rc_cc = CycleCloser('RC Cycle Closer')
-    ph = HeatExchanger("Preheater")
-    rc_ev = HeatExchanger("RC Evaporator")
-    sh = HeatExchanger("Superheater")
-
-    if mode == 'charging':
-        # HP system connections
-        c1 = Connection(cc, 'out1', ev, 'in2')
-        c2 = Connection(ev, 'out2', cp, 'in1')
-        c3 = Connection(cp, 'out1', pc, 'in1')
-        c4 = Connection(pc, 'out1', cd, 'in1')
-        c5 = Connection(cd, 'out1', sc, 'in1')
-        c6 = Connection(sc, 'out1', va, 'in1')
-        c7 = Connection(va, 'out1', cc, 'in1')
-
-        c21 = Connection(sso, 'out1', sc, 'in2')
-        c22 = Connection(sc, 'out2', cd, 'in2')
-        c23 = Connection(cd, 'out2', pc, 'in2')
-        c24 = Connection(pc, 'out2', ssi, 'in1')
-
-        c11 = Connection(aso, 'out1', ev, 'in1')
-        c12 = Connection(ev, 'out1', asi, 'in1')
-
-        network.add_conns(c1, c2, c3, c4, c5, c6, c7, c11, c12, c21, c22, c23, c24)
-
-        ev.set_attr(pr1=1, pr2=1, ttd_l=5)
-        cd.set_attr(pr1=1, pr2=1, ttd_u=5)
-        pc.set_attr(pr1=1, pr2=1, ttd_u=5)
-        sc.set_attr(pr1=1, pr2=1)
-
-        c11.set_attr(T=Tenv, fluid={"air": 1})
-        c12.set_attr(p=1)
-
-        c21.set_attr(T=Tsto_in, p=1, m=10, fluid={"water": 1})
-        c24.set_attr(T=Tsto_out)
-
-        c2.set_attr(p=9.5, x=1)
-        c3.set_attr(p=31, fluid={'R32': 1})
-        c6.set_attr(T=Tsto_in + 5)
-
-        # Busses
-        ep = Bus("Produkt")
-        ep.add_comps({"comp": ssi, "char": 0.98, "base": "component"},
-                     {"comp": sso, "char": 0.98, "base": "bus"})
-
-        ef = Bus('Fuel')
-        ef.add_comps({'comp': cp, 'base': 'bus'})
-
-        el = Bus('Loss')
-        el.add_comps({'comp': aso, 'base': 'bus'}, {'comp': asi})
-
-        network.add_busses(ep, ef, el)
-        network.set_attr(iterinfo=False)
-        network.solve(mode='design')
-        return network, ep, ef, el, cd, pc, sc, cp
-
-    else:
-        # ORC system connections
-        c31 = Connection(rc_cc, 'out1', tb, 'in1')
-        c32 = Connection(tb, 'out1', rc_cd, 'in1')
-        c33 = Connection(rc_cd, 'out1', p, 'in1')
-        c34 = Connection(p, 'out1', ph, 'in2')
-        c35 = Connection(ph, 'out2', rc_ev, 'in2')
-        c36 = Connection(rc_ev, 'out2', sh, 'in2')
-        c37 = Connection(sh, 'out2', rc_cc, 'in1')
-
-        c25 = Connection(sso, 'out1', sh, 'in1')
-        c26 = Connection(sh, 'out1', rc_ev, 'in1')
-        c27 = Connection(rc_ev, 'out1', ph, 'in1')
-        c28 = Connection(ph, 'out1', ssi, 'in1')
-
-        c41 = Connection(aso, 'out1', rc_cd, 'in2')
-        c42 = Connection(rc_cd, 'out2', asi, 'in1')
-
-        network.add_conns(c31, c32, c33, c34, c35, c36, c37, c25, c26, c27, c28, c41, c42)
-
-        rc_ev.set_attr(pr1=1, pr2=1, ttd_l=5)
-        tb.set_attr(eta_s=0.9)
-        rc_cd.set_attr(pr1=1, pr2=1, ttd_u=5)
-        ph.set_attr(pr1=1, pr2=1, ttd_l=5)
-        sh.set_attr(pr1=1, pr2=1, ttd_l=5)
-
-        c41.set_attr(T=Tenv, p=1, fluid={"air": 1})
-        c25.set_attr(T=Tsto_out, m=10, p=1, fluid={"water": 1})
-        c28.set_attr(T=Tsto_in)
-
-        c31.set_attr(p=8, T=Tsto_out-5, fluid={'R245fa': 1})
-        c32.set_attr(p=1)
-
-        gen = Bus("generator")
-        gen.add_comps({"comp": tb, "char": 0.98, "base": "component"},
-                      {"comp": p, "char": 0.98, "base": "bus"})
-
-        ef = Bus('Fuel')
-        ef.add_comps({'comp': sso, 'base': 'bus'},
-                     {'comp': ssi, 'base': 'component'})
-
-        el = Bus('Loss')
-        el.add_comps({'comp': aso, 'base': 'bus'}, {'comp': asi})
-
-        network.add_busses(gen, ef, el)
-        network.set_attr(iterinfo=False)
-        network.solve(mode='design')
-        return network, gen, ef, el, ph, rc_ev, sh
+# Heat pump (charging) and ORC (discharging) with a pressurized water storage
+
+import instrument
+from topology import apply_boundary, build
+
+SPEC = {
+    'components': {
+        'Compressor': 'Compressor',
+        'Condenser': 'Condenser',
+        'Expansion Valve': 'Valve',
+        'Evaporator': 'HeatExchanger',
+        'Pre Cooler': 'HeatExchanger',
+        'Sub Cooler': 'HeatExchanger',
+        'Cycle Closer': 'CycleCloser',
+        'Storage Source': 'Source',
+        'Storage Sink': 'Sink',
+        'Ambient Source': 'Source',
+        'Ambient Sink': 'Sink',
+        # ORC components
+        'Pump': 'Pump',
+        'Turbine': 'Turbine',
+        'RC Condenser': 'Condenser',
+        'RC Cycle Closer': 'CycleCloser',
+        'Preheater': 'HeatExchanger',
+        'RC Evaporator': 'HeatExchanger',
+        'Superheater': 'HeatExchanger',
+    },
+    'charging': {
+        'connections': {
+            # HP system connections
+            'c1': ('Cycle Closer', 'out1', 'Evaporator', 'in2'),
+            'c2': ('Evaporator', 'out2', 'Compressor', 'in1'),
+            'c3': ('Compressor', 'out1', 'Pre Cooler', 'in1'),
+            'c4': ('Pre Cooler', 'out1', 'Condenser', 'in1'),
+            'c5': ('Condenser', 'out1', 'Sub Cooler', 'in1'),
+            'c6': ('Sub Cooler', 'out1', 'Expansion Valve', 'in1'),
+            'c7': ('Expansion Valve', 'out1', 'Cycle Closer', 'in1'),
+            'c11': ('Ambient Source', 'out1', 'Evaporator', 'in1'),
+            'c12': ('Evaporator', 'out1', 'Ambient Sink', 'in1'),
+            'c21': ('Storage Source', 'out1', 'Sub Cooler', 'in2'),
+            'c22': ('Sub Cooler', 'out2', 'Condenser', 'in2'),
+            'c23': ('Condenser', 'out2', 'Pre Cooler', 'in2'),
+            'c24': ('Pre Cooler', 'out2', 'Storage Sink', 'in1'),
+        },
+        'attributes': {
+            'Evaporator': {'pr1': 1, 'pr2': 1, 'ttd_l': 5},
+            'Condenser': {'pr1': 1, 'pr2': 1, 'ttd_u': 5},
+            'Pre Cooler': {'pr1': 1, 'pr2': 1, 'ttd_u': 5},
+            'Sub Cooler': {'pr1': 1, 'pr2': 1},
+            'c11': {'fluid': {'air': 1}},
+            'c12': {'p': 1},
+            'c21': {'p': 1, 'm': 10, 'fluid': {'water': 1}},
+            'c2': {'p': 9.5, 'x': 1},
+            'c3': {'p': 31, 'fluid': {'R32': 1}},
+        },
+        # Storage and ambient temperatures are the only inputs that change between sweep points
+        'boundary': {
+            'c11': {'T': ('Tenv', 0)},
+            'c21': {'T': ('Tsto_in', 0)},
+            'c24': {'T': ('Tsto_out', 0)},
+            'c6': {'T': ('Tsto_in', 5)},
+        },
+        'busses': {
+            'ep': ('Produkt', [{'comp': 'Storage Sink', 'char': 0.98, 'base': 'component'},
+                               {'comp': 'Storage Source', 'char': 0.98, 'base': 'bus'}]),
+            'ef': ('Fuel', [{'comp': 'Compressor', 'base': 'bus'}]),
+            'el': ('Loss', [{'comp': 'Ambient Source', 'base': 'bus'}, {'comp': 'Ambient Sink'}]),
+        },
+        'returns': ['Condenser', 'Pre Cooler', 'Sub Cooler', 'Compressor'],
+    },
+    'discharging': {
+        'connections': {
+            # ORC system connections
+            'c31': ('RC Cycle Closer', 'out1', 'Turbine', 'in1'),
+            'c32': ('Turbine', 'out1', 'RC Condenser', 'in1'),
+            'c33': ('RC Condenser', 'out1', 'Pump', 'in1'),
+            'c34': ('Pump', 'out1', 'Preheater', 'in2'),
+            'c35': ('Preheater', 'out2', 'RC Evaporator', 'in2'),
+            'c36': ('RC Evaporator', 'out2', 'Superheater', 'in2'),
+            'c37': ('Superheater', 'out2', 'RC Cycle Closer', 'in1'),
+            'c25': ('Storage Source', 'out1', 'Superheater', 'in1'),
+            'c26': ('Superheater', 'out1', 'RC Evaporator', 'in1'),
+            'c27': ('RC Evaporator', 'out1', 'Preheater', 'in1'),
+            'c28': ('Preheater', 'out1', 'Storage Sink', 'in1'),
+            'c41': ('Ambient Source', 'out1', 'RC Condenser', 'in2'),
+            'c42': ('RC Condenser', 'out2', 'Ambient Sink', 'in1'),
+        },
+        'attributes': {
+            'RC Evaporator': {'pr1': 1, 'pr2': 1, 'ttd_l': 5},
+            'Turbine': {'eta_s': 0.9},
+            'RC Condenser': {'pr1': 1, 'pr2': 1, 'ttd_u': 5},
+            'Preheater': {'pr1': 1, 'pr2': 1, 'ttd_l': 5},
+            'Superheater': {'pr1': 1, 'pr2': 1, 'ttd_l': 5},
+            'c41': {'p': 1, 'fluid': {'air': 1}},
+            'c25': {'m': 10, 'p': 1, 'fluid': {'water': 1}},
+            'c31': {'p': 8, 'fluid': {'R245fa': 1}},
+            'c32': {'p': 1},
+        },
+        'boundary': {
+            'c41': {'T': ('Tenv', 0)},
+            'c25': {'T': ('Tsto_out', 0)},
+            'c28': {'T': ('Tsto_in', 0)},
+            'c31': {'T': ('Tsto_out', -5)},
+        },
+        'busses': {
+            'ep': ('generator', [{'comp': 'Turbine', 'char': 0.98, 'base': 'component'},
+                                 {'comp': 'Pump', 'char': 0.98, 'base': 'bus'}]),
+            'ef': ('Fuel', [{'comp': 'Storage Source', 'base': 'bus'},
+                            {'comp': 'Storage Sink', 'base': 'component'}]),
+            'el': ('Loss', [{'comp': 'Ambient Source', 'base': 'bus'}, {'comp': 'Ambient Sink'}]),
+        },
+        'returns': ['Preheater', 'RC Evaporator', 'Superheater'],
+    },
+}
+
+
+def build_system(network, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None):
+    return build(SPEC, network, mode, Tsto_in, Tsto_out, Tenv)
+
+
+def set_boundary(network, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None):
+    apply_boundary(SPEC, network, mode, Tsto_in, Tsto_out, Tenv)
+
+
+def create_system(network, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None, init_path=None):
+    parts = build_system(network, mode=mode, Tsto_in=Tsto_in, Tsto_out=Tsto_out, Tenv=Tenv)
+    instrument.solve(network, 'design', {'model': __name__, 'mode': mode, 'Tsto_in': Tsto_in, 'Tsto_out': Tsto_out,
+                                         'Tenv': Tenv}, init_path=init_path)
+    return parts
@@ -0,0 +1,237 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from retry import classify
+from sweep import evaluate, exergy_analysis, failed_record, split_chains
+from system import ModelSystem, model_name
+
+# Terminal temperature differences fixed in the design case, replaced by kA_char in offdesign
+TTD = ('ttd_u', 'ttd_l', 'ttd_min')
+
+# Heat exchangers sized by a connection temperature instead of a terminal temperature
+# difference; in offdesign they get kA_char and the connection specs become design-only.
+OFFDESIGN = {
+    'model1': {'charging': {'kA_char': ['Sub Cooler'], 'connections': {'c6': ['T']}}},
+    'model1_ihx': {'charging': {'kA_char': ['Sub Cooler'], 'connections': {'c7': ['T']}}},
+}
+
+# Connection whose mass flow is the load of a mode: the storage water of the
+# heat pump/ORC models and the working fluid of the Brayton models
+LOAD = {
+    'model1': {'charging': 'c21', 'discharging': 'c25'},
+    'model1_ihx': {'charging': 'c21', 'discharging': 'c25'},
+    'model2': {'charging': 'c2', 'discharging': 'd3'},
+    'model2_ihx': {'charging': 'c2', 'discharging': 'd3'},
+}
+
+
+def prepare_offdesign(network, model, mode):
+    """
+    Declare the design and offdesign specifications of a model's network.
+
+    Terminal temperature differences become design values replaced by ``kA_char``,
+    isentropic efficiencies are replaced by ``eta_s_char``, and the model specific
+    entries of OFFDESIGN are applied.
+
+    Args:
+        network (Network): Network as built by ``build_system``.
+        model (str): Model name.
+        mode (str): 'charging' or 'discharging'.
+    """
+    spec = OFFDESIGN.get(model_name(model), {}).get(mode, {})
+    for comp in network.comps['object']:
+        design = [param for param in TTD if hasattr(comp, param) and getattr(comp, param).is_set]
+        offdesign = ['kA_char'] if design or comp.label in spec.get('kA_char', []) else []
+        if hasattr(comp, 'eta_s') and comp.eta_s.is_set:
+            design.append('eta_s')
+            offdesign.append('eta_s_char')
+        if design or offdesign:
+            comp.set_attr(design=design, offdesign=offdesign)
+    for label, params in spec.get('connections', {}).items():
+        network.get_conn(label).set_attr(design=params)
+
+
+def invalid_design(network):
+    """
+    Heat exchangers of a solved design case that cannot be sized for offdesign.
+
+    A heat exchanger with a non-positive terminal temperature difference has no
+    finite kA, its ``kA_char`` would make every offdesign point fail.
+
+    Args:
+        network (Network): Solved design case, prepared by ``prepare_offdesign``.
+
+    Returns:
+        list: Labels of the heat exchangers replaced by ``kA_char`` in offdesign
+        with ``ttd_u`` or ``ttd_l`` not above zero or a non-finite ``kA``.
+    """
+    invalid = []
+    for comp in network.comps['object']:
+        if 'kA_char' not in getattr(comp, 'offdesign', []):
+            continue
+        ttd = [getattr(comp, param).val for param in ('ttd_u', 'ttd_l') if hasattr(comp, param)]
+        if any(not value > 0 for value in ttd) or not np.isfinite(comp.kA.val):
+            invalid.append(comp.label)
+    return invalid
+
+
+class OffdesignSystem(ModelSystem):
+    """
+    Network of one model and mode solved at part load against a fixed design.
+
+    Unless ``design_path`` already holds a saved design case, the design case is
+    solved and saved once. Load points are then solved in offdesign mode, each
+    starting from the previous solution, or from the design case after a point
+    that did not converge or raised. A design case that does not converge or
+    cannot be sized (see ``invalid_design``) raises a ValueError.
+
+    Args:
+        model (str or module): One of MODELS.
+        mode (str, optional): 'charging' or 'discharging'.
+        Tsto_in, Tsto_out, Tenv (float): Design boundary temperatures in °C.
+        design_path (str, optional): Directory of the saved design case, a temporary
+            directory by default, which is removed by ``close``.
+        params (dict, optional): Component/connection parameters of the design.
+    """
+
+    def __init__(self, model, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None, design_path=None,
+                 params=None):
+        super().__init__(model, mode, Tsto_in=Tsto_in, Tsto_out=Tsto_out, Tenv=Tenv, params=params)
+        prepare_offdesign(self.network, self.model, mode)
+        self.load_connection = self.network.get_conn(LOAD[self.model][mode])
+        self._warm = False
+        self.error = None
+
+        saved = design_path is not None and os.path.exists(os.path.join(design_path, 'connections.csv'))
+        self._temporary = design_path is None
+        self.design_path = design_path or tempfile.mkdtemp(prefix=f"{self.model}_{mode}_design_")
+        if not saved:
+            try:
+                if not super().solve():
+                    raise ValueError(f"The design case of {self.model} ({mode}) did not converge.")
+                invalid = invalid_design(self.network)
+                if invalid:
+                    raise ValueError(f"The design case of {self.model} ({mode}) cannot be sized for offdesign, "
+                                     f"non-positive terminal temperature difference or non-finite kA at "
+                                     f"{', '.join(invalid)}.")
+            except Exception:
+                self.close()
+                raise
+            self.network.save(self.design_path)
+            self._warm = True
+        self.m_design = float(pd.read_csv(os.path.join(self.design_path, 'connections.csv'), sep=';',
+                                          index_col=0).loc[self.load_connection.label, 'm'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Remove the design case if it was saved to a temporary directory."""
+        if self._temporary:
+            shutil.rmtree(self.design_path, ignore_errors=True)
+            self._temporary = False
+
+    def solve(self, load=1.0, **boundary):
+        """
+        Solve one offdesign point.
+
+        Args:
+            load (float, optional): Mass flow of the load connection relative to design.
+            **boundary: Boundary temperatures differing from the previous point.
+
+        Returns:
+            bool: Whether the solver converged, False if it raised. The exception is
+            kept as ``error`` until the next point.
+        """
+        if boundary:
+            self.set_boundary(**boundary)
+        self.load_connection.set_attr(m=load * self.m_design)
+        # start from the saved design case unless the previous point converged
+        init_path = None if self._warm else self.design_path
+        self.error = None
+        try:
+            converged = super().solve(init_path=init_path, init_previous=self._warm, design_path=self.design_path)
+        except Exception as e:
+            converged, self.error = False, e
+        self._warm = converged
+        return converged
+
+    def record(self, pamb=1, Tamb=10):
+        """
+        KPIs, exergy efficiency and solver statistics of the current point, see ``sweep.evaluate``.
+
+        A point that did not converge only has the solver statistics and status of
+        ``sweep.failed_record``, 'exception:<type>' if the solver raised.
+        """
+        record = {'load': self.load_connection.m.val / self.m_design, **self.boundary}
+        if self.error is not None or not self.network.converged:
+            status = None if self.error is None else classify(error=self.error)
+            record.update(failed_record(self.network, self.mode, status=status))
+            return record
+        ean = exergy_analysis(self.network, self.ep, self.ef, self.el, pamb=pamb, Tamb=Tamb)
+        record.update(evaluate(self.model, self.mode, self.network, self.ep, self.ef, ean))
+        return record
+
+
+def _part_load_job(job):
+    model, mode, design, design_path, chain, pamb = job
+    system = OffdesignSystem(model, mode, design_path=design_path, **design)
+    records = []
+    for load, Tenv in chain:
+        system.solve(load, Tenv=Tenv)
+        records.append(system.record(pamb=pamb))
+    return records
+
+
+def part_load_map(model, mode, design, loads, Tenv=None, workers=None, design_path=None, pamb=1):
+    """
+    Solve part-load points of one mode against a common design case.
+
+    The design case is solved and saved once, every worker then walks a contiguous
+    chain of load points in offdesign mode, warm-started from its predecessor.
+
+    Args:
+        model (str): One of MODELS.
+        mode (str): 'charging' or 'discharging'.
+        design (dict): Design boundary temperatures ``Tsto_in``, ``Tsto_out``, ``Tenv``.
+        loads (list): Mass flows of the load connection relative to design, see LOAD.
+        Tenv (list, optional): Ambient temperatures to combine with the loads,
+            default the design temperature.
+        workers (int, optional): Number of processes, ``1`` solves in-process.
+        design_path (str, optional): Directory of the design case.
+        pamb (float, optional): Ambient pressure of the exergy analysis in bar.
+
+    Returns:
+        pd.DataFrame: One row per load point with load, boundary temperatures, KPI,
+        exergy efficiency and solver statistics. Points that did not converge are
+        kept with ``converged`` False, their ``status`` and NaN results.
+    """
+    # the design case is shared by the workers, a temporary one is removed afterwards
+    temporary = design_path is None
+    design_path = design_path or tempfile.mkdtemp(prefix=f"{model_name(model)}_{mode}_design_")
+    try:
+        OffdesignSystem(model, mode, design_path=design_path, **design)
+        Tenv = [design['Tenv']] if Tenv is None else Tenv
+        # walk away from the design point: loads by distance to 1, ambient temperature back and forth
+        loads = sorted(loads, key=lambda load: abs(load - 1))
+        points = [(load, t) for i, t in enumerate(Tenv) for load in (loads if i % 2 == 0 else loads[::-1])]
+
+        workers = min(workers or os.cpu_count(), len(points))
+        jobs = [(model, mode, design, design_path, chain, pamb) for chain in split_chains(points, workers)]
+        if workers == 1:
+            chains = [_part_load_job(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chains = list(pool.map(_part_load_job, jobs))
+    finally:
+        if temporary:
+            shutil.rmtree(design_path, ignore_errors=True)
+    return pd.DataFrame([record for chain in chains for record in chain])
@@ -0,0 +1,239 @@
+import json
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import differential_evolution
+
+from speco import purchased_equipment_cost
+from sweep import point_key, read_checkpoint, solve_tables
+from system import BOUNDARY, MODES, check_params, model_name
+
+# Cycle pressures in bar fixed in the models and a search range for each of them:
+# evaporation/condensation of the heat pump and ORC, low/high pressure of the Brayton cycles
+PRESSURES = {
+    'model1': {'c2.p': (6, 14), 'c3.p': (24, 40), 'c31.p': (5, 12)},
+    'model1_ihx': {'c2.p': (6, 14), 'c4.p': (24, 40), 'c31.p': (5, 12)},
+    'model2': {'c1.p': (10, 30), 'c3.p': (80, 130), 'd1.p': (10, 30), 'd3.p': (80, 130)},
+    'model2_ihx': {'c1.p': (10, 30), 'c2.p': (80, 130), 'd1.p': (10, 30), 'd3.p': (80, 130)},
+}
+
+# Objectives to maximize, computed from a design point record
+OBJECTIVES = {
+    'RTE': lambda record: record['COP'] * record['eta'],
+    'eps': lambda record: record['eps_char'] * record['eps_dis'] / 100,
+}
+
+# Objective value of points that fail to solve
+PENALTY = 1e3
+
+# Default smallest temperature difference in K: the terminal temperature differences
+# the heat exchangers of each model are designed with
+DT_MIN = {'model1': 5, 'model1_ihx': 5, 'model2': 1, 'model2_ihx': 1}
+
+# Shortfall below dT_min in K that is solver round-off, as in ``pinch.check_pinch``
+DT_TOL = 1e-2
+
+
+def check_variables(model, bounds, fixed):
+    """Raise if a boundary temperature is neither varied nor fixed or a variable matches no parameter."""
+    missing = [name for name in BOUNDARY if name not in bounds and name not in fixed]
+    if missing:
+        raise ValueError(f"The boundary temperature(s) {missing} are neither varied nor fixed.")
+    check_params(model, bounds)
+
+
+def design_point(model, point, dT_min=None, pamb=1, Tamb=10, cache=None):
+    """
+    Solve both modes of a design point and check its constraints.
+
+    Discharging is not solved if charging fails. Solver exceptions count as failures,
+    a point without all boundary temperatures raises KeyError.
+
+    Args:
+        model (str): One of MODELS.
+        point (dict): Boundary temperatures and component/connection parameters.
+        dT_min (float, optional): Smallest allowed temperature difference in the heat
+            exchangers in K, checked on the segment-wise profiles. Default from DT_MIN,
+            shortfalls up to DT_TOL are not counted.
+        cache (ResultCache, optional): Result cache of the solves.
+
+    Returns:
+        dict: The point, COP, eta, RTE in %, eps_char, eps_dis, eps in %, the minimum
+        temperature difference of each mode, the purchased equipment cost ``PEC`` of
+        both modes in € and the ``specific investment`` per discharging power in €/kW,
+        ``converged`` and ``violation``, the temperature difference missing to ``dT_min`` in K.
+    """
+    dT_min = DT_MIN[model_name(model)] if dT_min is None else dT_min
+    record = dict(point, converged=False, violation=np.inf)
+    boundary = {key: point[key] for key in BOUNDARY}
+    params = {key: value for key, value in point.items() if key not in BOUNDARY}
+    violation, PEC = 0.0, 0.0
+    for mode, suffix in zip(MODES, ('char', 'dis')):
+        try:
+            tables = solve_tables(model, mode, **boundary, pamb=pamb, Tamb=Tamb, cache=cache, params=params)
+        except Exception:
+            return record
+        if not tables['record']['converged']:
+            return record
+        record.update({key: tables['record'][key] for key in ('COP', 'eta') if key in tables['record']})
+        record['eps_' + suffix] = tables['record']['eps']
+        dT = tables['sizing']['summary']['dT_min']
+        record[f"dT_min ({suffix})"] = float(dT.min()) if len(dT) else np.inf
+        shortfall = dT_min - record[f"dT_min ({suffix})"]
+        violation += shortfall if shortfall > DT_TOL else 0.0
+        PEC += sum(float(cost[0]) for cost in purchased_equipment_cost([tables]).values())
+        record[f"P_el ({suffix})"] = tables['record']['P_el']
+    record.update(converged=True, violation=violation, PEC=PEC)
+    record['specific investment'] = PEC / (record['P_el (dis)'] / 1e3)
+    for name, objective in OBJECTIVES.items():
+        record[name] = objective(record)
+    return record
+
+
+def feasible(record):
+    """Whether a design point record converged and keeps ``dT_min``."""
+    return bool(record['converged']) and record['violation'] == 0
+
+
+class Evaluator:
+    """
+    Memoizing, parallel evaluation of design points for ``differential_evolution``.
+
+    An instance is passed as ``workers``: it receives the population, rounds the
+    candidates to ``decimals``, solves only the points not evaluated before in a
+    process pool and returns the penalized objective. Every record is kept in ``memo``.
+
+    Args:
+        model (str): One of MODELS.
+        names (list): Names of the optimization variables.
+        fixed (dict): Values of the boundary temperatures that are not varied.
+        objective (str, optional): Key of OBJECTIVES to maximize. Default is 'RTE'.
+        dT_min (float, optional): See ``design_point``, default from DT_MIN.
+        weight (float, optional): Penalty per K of violated ``dT_min``.
+        decimals (int, optional): Rounding of the candidates, coarser rounding gives
+            more memo hits. Default is 2.
+        workers (int, optional): Number of processes, ``1`` solves in-process.
+        archive (str, optional): JSON lines file of all evaluated points in the format
+            of a sweep checkpoint; points already in it are not solved again.
+    """
+
+    def __init__(self, model, names, fixed, objective='RTE', dT_min=None, weight=10, decimals=2, workers=None,
+                 pamb=1, Tamb=10, cache=None, archive=None):
+        self.model = model
+        self.names = list(names)
+        self.fixed = dict(fixed)
+        self.objective = objective
+        self.dT_min = DT_MIN[model_name(model)] if dT_min is None else dT_min
+        self.weight = weight
+        self.decimals = decimals
+        self.workers = workers or os.cpu_count()
+        self.pamb = pamb
+        self.Tamb = Tamb
+        self.cache = cache
+        self.archive = archive
+        self.memo = {}
+        if archive is not None:
+            self.memo = {key: entry['record'] for key, entry in read_checkpoint(archive).items()}
+            os.makedirs(os.path.dirname(archive) or '.', exist_ok=True)
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def point(self, x):
+        """Design point of a candidate vector."""
+        return dict(self.fixed, **{name: round(float(value), self.decimals) for name, value in zip(self.names, x)})
+
+    def value(self, record):
+        """Penalized objective to minimize."""
+        if not record['converged']:
+            return PENALTY
+        return -OBJECTIVES[self.objective](record) + self.weight * record['violation']
+
+    def evaluate(self, points):
+        """Records of many design points, solving each distinct point once."""
+        keys = [point_key(point) for point in points]
+        new = {key: point for key, point in zip(keys, points) if key not in self.memo}
+        jobs = [(self.model, point, self.dT_min, self.pamb, self.Tamb, self.cache) for point in new.values()]
+        if self.pool is None:
+            records = [_design_point_job(job) for job in jobs]
+        else:
+            records = list(self.pool.map(_design_point_job, jobs))
+        self.memo.update(zip(new, records))
+        if self.archive is not None and records:
+            with open(self.archive, 'a') as f:
+                for point, record in zip(new.values(), records):
+                    f.write(json.dumps({'point': point, 'record': record}) + '\n')
+        return [self.memo[key] for key in keys]
+
+    def fun(self, x):
+        """Penalized objective of a single candidate."""
+        return self.value(self.evaluate([self.point(x)])[0])
+
+    def __call__(self, func, candidates):
+        return [self.value(record) for record in self.evaluate([self.point(x) for x in candidates])]
+
+    def history(self):
+        """All evaluated design points as DataFrame."""
+        return pd.DataFrame(list(self.memo.values()))
+
+
+def _design_point_job(job):
+    return design_point(*job)
+
+
+def optimize(model, bounds=None, fixed=None, objective='RTE', dT_min=None, popsize=8, maxiter=30, seed=None,
+             workers=None, decimals=2, weight=10, pamb=1, Tamb=10, cache=None, archive=None, **kwargs):
+    """
+    Maximize the round-trip or exergy efficiency of a model by differential evolution.
+
+    Infeasible points, non-convergent or violating ``dT_min``, are penalized. Each
+    generation is solved in parallel, repeated candidates are served from the memo.
+
+    Args:
+        model (str): One of MODELS.
+        bounds (dict, optional): (lower, upper) per variable, boundary temperatures or
+            component/connection parameters. Default are the PRESSURES of the model.
+        fixed (dict, optional): Values of the boundary temperatures that are not varied.
+        objective (str, optional): 'RTE' or 'eps'. Default is 'RTE'.
+        dT_min (float, optional): See ``design_point``, default from DT_MIN.
+        popsize, maxiter, seed: See ``scipy.optimize.differential_evolution``.
+        workers (int, optional): Number of processes.
+        archive (str, optional): Archive of evaluated points, see ``Evaluator``.
+        **kwargs: Passed on to ``differential_evolution``.
+
+    Returns:
+        tuple: Record of the best design point, DataFrame of all evaluated points and
+        the ``OptimizeResult``. The record's ``feasible`` is False, with a warning, if
+        the best point violates ``dT_min``.
+
+    Raises:
+        RuntimeError: If no evaluated point converged.
+    """
+    bounds = dict(PRESSURES[model_name(model)] if bounds is None else bounds)
+    fixed = dict(fixed or {})
+    check_variables(model, bounds, fixed)
+
+    evaluator = Evaluator(model, bounds, fixed, objective, dT_min, weight, decimals, workers, pamb, Tamb, cache,
+                          archive)
+    with evaluator:
+        result = differential_evolution(evaluator.fun, list(bounds.values()), popsize=popsize, maxiter=maxiter,
+                                        seed=seed, workers=evaluator, updating='deferred', polish=False, **kwargs)
+    best = dict(evaluator.memo[point_key(evaluator.point(result.x))])
+    if not best['converged']:
+        raise RuntimeError(f"No design point of {model_name(model)} converged, there is no optimum.")
+    best['feasible'] = feasible(best)
+    if not best['feasible']:
+        warnings.warn(f"The best design point of {model_name(model)} violates dT_min={evaluator.dT_min} K by "
+                      f"{best['violation']:.2f} K, no feasible point was found.")
+    return best, evaluator.history(), result
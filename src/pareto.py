@@ -0,0 +1,181 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from optimizer import PRESSURES, Evaluator, check_variables, feasible
+from system import MODELS, model_name
+
+# Objectives of the search with the sign turning them into minimization
+OBJECTIVES = {'RTE': -1, 'specific investment': 1}
+
+
+def non_dominated_sort(F):
+    """
+    Fronts of a minimization problem.
+
+    Args:
+        F (np.ndarray): Objective values of shape (n, m).
+
+    Returns:
+        np.ndarray: Front index per row, 0 is the non-dominated set.
+    """
+    F = np.asarray(F, dtype=float)
+    dominates = np.all(F[:, None] <= F[None], axis=2) & np.any(F[:, None] < F[None], axis=2)
+    count = dominates.sum(axis=0)
+    rank = np.full(len(F), -1)
+    front, i = np.flatnonzero(count == 0), 0
+    while front.size:
+        rank[front] = i
+        count -= dominates[front].sum(axis=0)
+        front, i = np.flatnonzero((count == 0) & (rank == -1)), i + 1
+    return rank
+
+
+def crowding_distance(F):
+    """Crowding distance of the rows of one front, infinite at the extremes."""
+    F = np.asarray(F, dtype=float)
+    distance = np.zeros(len(F))
+    for column in F.T:
+        order = np.argsort(column)
+        span = column[order[-1]] - column[order[0]]
+        distance[order[[0, -1]]] = np.inf
+        if span > 0 and len(F) > 2:
+            distance[order[1:-1]] += (column[order[2:]] - column[order[:-2]]) / span
+    return distance
+
+
+def rank_population(records):
+    """
+    Rank and crowding distance with constraint domination.
+
+    Feasible individuals are sorted into fronts, infeasible ones follow in order of
+    their constraint violation (failed solves last).
+
+    Returns:
+        tuple: Rank and crowding distance per record.
+    """
+    valid = np.array([feasible(record) for record in records], dtype=bool)
+    rank = np.zeros(len(records), dtype=int)
+    distance = np.zeros(len(records))
+    if valid.any():
+        F = np.array([[sign * records[i][name] for name, sign in OBJECTIVES.items()]
+                      for i in np.flatnonzero(valid)])
+        fronts = non_dominated_sort(F)
+        rank[valid] = fronts
+        for front in np.unique(fronts):
+            members = np.flatnonzero(valid)[fronts == front]
+            distance[members] = crowding_distance(F[fronts == front])
+    infeasible = np.flatnonzero(~valid)
+    violation = np.array([records[i]['violation'] for i in infeasible])
+    rank[infeasible] = rank.max(initial=0) + 1 + np.argsort(np.argsort(violation, kind='stable'))
+    return rank, distance
+
+
+def _offspring(parents, rank, distance, lower, upper, rng, eta_c=15, eta_m=20):
+    """Binary tournament, simulated binary crossover and polynomial mutation."""
+    n, d = parents.shape
+    a, b = rng.integers(n, size=(2, n))
+    better = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (distance[a] > distance[b]))
+    mates = parents[np.where(better, a, b)]
+
+    children = mates.copy()
+    u = rng.random((n // 2, d))
+    beta = np.where(u <= 0.5, (2 * u) ** (1 / (eta_c + 1)), (1 / (2 * (1 - u))) ** (1 / (eta_c + 1)))
+    cross = rng.random((n // 2, d)) < 0.5
+    p1, p2 = mates[0:n // 2 * 2:2], mates[1:n // 2 * 2:2]
+    children[0:n // 2 * 2:2] = np.where(cross, 0.5 * ((1 + beta) * p1 + (1 - beta) * p2), p1)
+    children[1:n // 2 * 2:2] = np.where(cross, 0.5 * ((1 - beta) * p1 + (1 + beta) * p2), p2)
+
+    u = rng.random((n, d))
+    delta = np.where(u < 0.5, (2 * u) ** (1 / (eta_m + 1)) - 1, 1 - (2 * (1 - u)) ** (1 / (eta_m + 1)))
+    mutate = rng.random((n, d)) < 1 / d
+    children = children + mutate * delta * (upper - lower)
+    return np.clip(children, lower, upper)
+
+
+def nsga2(model, bounds=None, fixed=None, pop_size=40, generations=30, seed=None, workers=None, archive=None,
+          dT_min=None, decimals=2, pamb=1, Tamb=10, cache=None):
+    """
+    Pareto front of round-trip efficiency vs. specific investment by NSGA-II.
+
+    Every generation is solved as one parallel batch. All evaluated individuals are
+    appended to ``archive``; a restarted search reads them back and only solves new
+    candidates.
+
+    Args:
+        model (str): One of MODELS.
+        bounds (dict, optional): (lower, upper) per variable. Default are the PRESSURES of the model.
+        fixed (dict): Values of the boundary temperatures that are not varied, all three
+            unless they are in ``bounds``.
+        pop_size (int, optional): Population size. Default is 40.
+        generations (int, optional): Number of generations. Default is 30.
+        archive (str, optional): JSON lines archive of the evaluated individuals.
+        dT_min, decimals: See ``optimizer.Evaluator``, ``dT_min`` defaults to the model's DT_MIN.
+
+    Returns:
+        tuple: DataFrame of the non-dominated feasible individuals of all evaluations,
+        sorted by RTE, empty if none keeps ``dT_min``, and DataFrame of all evaluated individuals.
+
+    Raises:
+        RuntimeError: If no evaluated individual converged.
+    """
+    bounds = dict(PRESSURES[model_name(model)] if bounds is None else bounds)
+    fixed = dict(fixed or {})
+    check_variables(model, bounds, fixed)
+    lower, upper = np.array(list(bounds.values()), dtype=float).T
+    rng = np.random.default_rng(seed)
+
+    with Evaluator(model, bounds, fixed, 'RTE', dT_min, decimals=decimals, workers=workers, pamb=pamb, Tamb=Tamb,
+                   cache=cache, archive=archive) as evaluator:
+        population = lower + rng.random((pop_size, len(bounds))) * (upper - lower)
+        records = evaluator.evaluate([evaluator.point(x) for x in population])
+        for _ in range(generations):
+            rank, distance = rank_population(records)
+            children = _offspring(population, rank, distance, lower, upper, rng)
+            merged = np.vstack([population, children])
+            records = records + evaluator.evaluate([evaluator.point(x) for x in children])
+
+            # elitist survival by front, then by crowding distance
+            rank, distance = rank_population(records)
+            survivors = np.lexsort((-distance, rank))[:pop_size]
+            population, records = merged[survivors], [records[i] for i in survivors]
+        history = evaluator.history()
+
+    # the archive may hold individuals of other fixed boundary temperatures
+    valid = history
+    for name, value in fixed.items():
+        valid = valid[valid[name] == value]
+    # without a converged individual the history has no objective columns
+    if not valid['converged'].any():
+        raise RuntimeError(f"No design point of {model_name(model)} converged, there is no optimum.")
+    valid = valid[np.array([feasible(record) for record in valid.to_dict('records')], dtype=bool)]
+    F = valid[list(OBJECTIVES)].to_numpy(float) * np.array(list(OBJECTIVES.values()))
+    front = valid[non_dominated_sort(F) == 0] if len(valid) else valid
+    return front.sort_values('RTE').reset_index(drop=True), history
+
+
+def pareto_fronts(models=MODELS, bounds=None, fixed=None, archive_dir=None, **kwargs):
+    """
+    Pareto fronts of several models on the shared objectives.
+
+    Args:
+        models (tuple, optional): Models to compare, default all.
+        bounds (dict, optional): Variable bounds per model, default their PRESSURES.
+        fixed (dict): Boundary temperatures shared by all models, see ``nsga2``.
+        archive_dir (str, optional): Directory of one archive per model.
+        **kwargs: Passed on to ``nsga2``, ``dT_min`` defaults per model.
+
+    Returns:
+        pd.DataFrame: Non-dominated individuals of all models with a 'model' column.
+    """
+    # check every model before the first search starts
+    for model in models:
+        check_variables(model, (bounds or {}).get(model) or PRESSURES[model], fixed or {})
+    fronts = []
+    for model in models:
+        archive = None if archive_dir is None else os.path.join(archive_dir, f"{model}.jsonl")
+        front, _ = nsga2(model, (bounds or {}).get(model), fixed, archive=archive, **kwargs)
+        fronts.append(front.assign(model=model))
+    df = pd.concat(fronts, ignore_index=True)
+    return df[['model'] + [column for column in df.columns if column != 'model']]
@@ -0,0 +1,203 @@
+import CoolProp
+import numpy as np
+
+PROFILE_DTYPE = np.dtype([('Q', 'f8'), ('T_hot', 'f8'), ('T_cold', 'f8'), ('dT', 'f8')])
+SUMMARY_DTYPE = np.dtype([('component', 'U64'), ('dT_min', 'f8'), ('dT_max', 'f8'),
+                          ('Q_pinch', 'f8'), ('T_hot_pinch', 'f8'), ('T_cold_pinch', 'f8'),
+                          ('i_pinch', 'i8')])
+
+# CoolProp backends for the profile interpolation; the tabular ones interpolate tables
+# built from HEOS and trade accuracy for speed. The high-level PropsSI rejects them, so
+# the properties are evaluated on a low-level AbstractState.
+BACKENDS = ('HEOS', 'BICUBIC', 'TTSE')
+
+# AbstractState per (backend, fluid), the tables of a tabular backend are built once per process
+_STATES = {}
+
+# Non-fluid columns of TESPy's connection results
+PROPERTY_COLUMNS = {'m', 'v', 'p', 'h', 'T', 'Td_bp', 'vol', 'x', 's', 'phase'}
+
+
+def connection_fluid(df, label):
+    """
+    Read the working fluid of a connection from TESPy's connection results.
+
+    Args:
+        df (pd.DataFrame): Connection results including the fluid mass fraction columns,
+            or a ``fluid`` column as in the results store.
+        label (str): Connection label.
+
+    Returns:
+        str: Name of the fluid with the largest mass fraction.
+    """
+    if 'fluid' in df.columns:
+        return df.loc[label, 'fluid']
+    fluid_columns = [col for col in df.columns
+                     if col not in PROPERTY_COLUMNS and not col.endswith('_unit')]
+    if not fluid_columns:
+        raise ValueError("The connection results contain no fluid composition, pass fluids explicitly.")
+    return df.loc[label, fluid_columns].astype(float).idxmax()
+
+
+def hx_streams(network, labels=None):
+    """
+    Collect the stream labels of the heat exchangers of a network.
+
+    Inlet/outlet 1 is the hot side and 2 the cold side for all TESPy heat exchangers.
+
+    Args:
+        network (Network): Network with its connections added.
+        labels (list, optional): Heat exchanger labels, default all heat exchangers.
+
+    Returns:
+        dict: ``component_names``, ``hot_in``, ``hot_out``, ``cold_in`` and ``cold_out``
+        lists ready to be passed to ``pinch_analysis``.
+    """
+    if labels is None:
+        labels = [label for label, comp in network.comps['object'].items()
+                  if len(comp.inl) == 2 and len(comp.outl) == 2 and hasattr(comp, 'kA')]
+    streams = {'component_names': [], 'hot_in': [], 'hot_out': [], 'cold_in': [], 'cold_out': []}
+    for label in labels:
+        comp = network.get_comp(label)
+        streams['component_names'].append(label)
+        streams['hot_in'].append(comp.inl[0].label)
+        streams['hot_out'].append(comp.outl[0].label)
+        streams['cold_in'].append(comp.inl[1].label)
+        streams['cold_out'].append(comp.outl[1].label)
+    return streams
+
+
+def abstract_state(backend, fluid):
+    """
+    Low-level CoolProp state of a fluid, shared within the process.
+
+    Args:
+        backend (str): One of BACKENDS.
+        fluid (str): CoolProp fluid name.
+
+    Returns:
+        AbstractState: The state, building it loads or builds the tables of a tabular backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', choose from {BACKENDS}.")
+    if (backend, fluid) not in _STATES:
+        _STATES[backend, fluid] = CoolProp.AbstractState(backend, fluid)
+    return _STATES[backend, fluid]
+
+
+def temperature_hp(state, h, p):
+    """
+    Temperatures at enthalpy/pressure pairs.
+
+    Args:
+        state (AbstractState): State to evaluate, see ``abstract_state``.
+        h (np.ndarray): Enthalpy in J/kg.
+        p (np.ndarray): Pressure in Pa.
+
+    Returns:
+        np.ndarray: Temperature in K, NaN where the backend cannot evaluate the state.
+    """
+    T = np.empty(len(h))
+    for i, (h_i, p_i) in enumerate(zip(h, p)):
+        try:
+            state.update(CoolProp.HmassP_INPUTS, h_i, p_i)
+            T[i] = state.T()
+        except ValueError:
+            T[i] = np.nan
+    return T
+
+
+def side_temperatures(h_start, h_end, p_start, p_end, fluid, step_number, T_start, backend='HEOS'):
+    """
+    Discretize one heat exchanger side along enthalpy and return its temperatures.
+
+    Args:
+        h_start, h_end (float): Enthalpy at both ends in kJ/kg.
+        p_start, p_end (float): Pressure at both ends in bar.
+        fluid (str): CoolProp fluid name.
+        step_number (int): Number of interpolation steps.
+        T_start (float): Known temperature at ``h_start`` in °C.
+        backend (str, optional): CoolProp backend, one of BACKENDS. Default is 'HEOS'.
+
+    Returns:
+        tuple: Enthalpy steps (without the start point) and temperatures in °C
+        (with the start point).
+    """
+    j = np.linspace(1, step_number, step_number)
+    h = h_start + (h_end - h_start) / step_number * j
+    p = p_start - (p_start - p_end) / step_number * j
+    T = np.concatenate(([T_start], temperature_hp(abstract_state(backend, fluid), h * 1e3, p * 1e5) - 273.15))
+    return h, T
+
+
+def pinch_analysis(df, hot_in, hot_out, cold_in, cold_out, fluids=None,
+                   component_names=None, step_number=200, backend='HEOS'):
+    """
+    Compute the T-Q profiles and pinch points of heat exchangers without plotting.
+
+    Args:
+        df (pd.DataFrame): Connection results with columns 'T', 'p', 'h' and 'm'.
+        hot_in (list): Labels of the hot inlets in the DataFrame.
+        hot_out (list): Labels of the hot outlets.
+        cold_in (list): Labels of the cold inlets.
+        cold_out (list): Labels of the cold outlets.
+        fluids (tuple or list, optional): (hot, cold) fluid pair for all heat
+            exchangers, or one pair per heat exchanger. Default is to read the fluid
+            of every stream from the fluid columns of ``df``.
+        component_names (list, optional): Names of the heat exchangers.
+        step_number (int, optional): Number of interpolation steps. Default is 200.
+        backend (str, optional): CoolProp backend, one of BACKENDS. Default is 'HEOS'.
+
+    Returns:
+        dict: ``summary`` structured array with one row per heat exchanger
+        (min/max temperature difference and pinch location) and ``profiles``, a list
+        of structured arrays with Q [kW], T_hot, T_cold and dT [°C / K].
+    """
+    if component_names is None:
+        component_names = [f"HX {i + 1}" for i in range(len(hot_in))]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', choose from {BACKENDS}.")
+    if fluids is None:
+        fluids = [(connection_fluid(df, hot_in[i]), connection_fluid(df, cold_in[i]))
+                  for i in range(len(hot_in))]
+    elif isinstance(fluids[0], str):
+        fluids = [fluids] * len(hot_in)
+
+    summary = np.zeros(len(hot_in), dtype=SUMMARY_DTYPE)
+    profiles = []
+    for i, component in enumerate(component_names):
+        fluid_hot, fluid_cold = fluids[i]
+        hi, ho, ci, co = df.loc[hot_in[i]], df.loc[hot_out[i]], df.loc[cold_in[i]], df.loc[cold_out[i]]
+
+        # the hot side is walked backwards from its outlet, so both sides share the Q axis
+        _, T_hot = side_temperatures(ho['h'], hi['h'], ho['p'], hi['p'], fluid_hot, step_number, ho['T'],
+                                     backend)
+        h_cold, T_cold = side_temperatures(ci['h'], co['h'], ci['p'], co['p'], fluid_cold, step_number, ci['T'],
+                                           backend)
+
+        profile = np.zeros(step_number + 1, dtype=PROFILE_DTYPE)
+        profile['Q'][1:] = (h_cold - ci['h']) * ci['m']
+        profile['T_hot'] = T_hot
+        profile['T_cold'] = T_cold
+        profile['dT'] = T_hot - T_cold
+        profiles.append(profile)
+
+        i_pinch = int(np.argmin(profile['dT']))
+        summary[i] = (component, profile['dT'][i_pinch], profile['dT'].max(), profile['Q'][i_pinch],
+                      T_hot[i_pinch], T_cold[i_pinch], i_pinch)
+
+    return {'summary': summary, 'profiles': profiles}
+
+
+def check_pinch(result, delta_t_min, tol=1e-2):
+    """
+    Return the names of heat exchangers violating the minimum temperature difference.
+
+    Args:
+        result (dict): Output of ``pinch_analysis``.
+        delta_t_min (float): Minimum allowable temperature difference in K.
+        tol (float, optional): Tolerance for the comparison. Default is 1e-2.
+    """
+    summary = result['summary']
+    violated = (summary['dT_min'] < delta_t_min) & (np.abs(summary['dT_min'] - delta_t_min) > tol)
+    return list(summary['component'][violated])
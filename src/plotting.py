@@ -0,0 +1,224 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+from diagrams import DEFAULT_UNITS, get_diagram
+from pinch import connection_fluid, pinch_analysis
+from sweep import solve_tables, split_chains
+
+VIEWS = ('logph', 'Ts', 'QT')
+
+# Axis of the fluid property diagrams, x/y property and label
+AXES = {
+    'logph': ('h', 'p', 'Enthalpy, h in kJ/kg', 'Pressure, p in bar'),
+    'Ts': ('s', 'T', 'Entropy, s in J/kgK', 'Temperature, T in °C'),
+}
+
+DEFAULT_ISOLINES = {
+    'Q': np.linspace(0, 1, 2),
+    'p': np.array([1, 2, 5, 10, 20, 50, 100, 300]),
+    'vol': np.array([]),
+    'h': np.arange(500, 3501, 500),
+}
+
+
+def case_tables(case, cache=None):
+    """Result tables of a case, either given as ``tables`` or solved (or read from the cache)."""
+    if 'tables' in case:
+        return case['tables']
+    tables = solve_tables(case['model'], case['mode'], case['Tsto_in'], case['Tsto_out'], case['Tenv'],
+                          cache=cache)
+    if not tables['record']['converged']:
+        raise ValueError(f"Case {case} did not converge ({tables['record']['status']}), nothing to plot.")
+    return tables
+
+
+def process_lines(tables, fluid, isolines=DEFAULT_ISOLINES, units=None):
+    """
+    Calculate the process lines of all components operating on one fluid.
+
+    Args:
+        tables (dict): Result tables of one solve, see ``cache.result_tables``.
+        fluid (str): Fluid of the diagram, components on other fluids are skipped.
+        isolines (dict, optional): Isolines of the diagram backdrop.
+        units (dict, optional): Unit system of the diagram.
+
+    Returns:
+        dict: Datapoints of ``calc_individual_isoline`` per '<component> <side>'.
+    """
+    diagram = get_diagram(fluid, isolines, units)
+    connections = tables['results']['Connection']
+    lines = {}
+    for label, sides in tables['plotting'].items():
+        for side, data in sides.items():
+            inlet = tables['ports'][label]['inlets'][side - 1]
+            if connection_fluid(connections, inlet) == fluid:
+                lines[f"{label} {side}"] = diagram.calc_individual_isoline(**data)
+    return lines
+
+
+def _case_job(job):
+    """Solve or load one case in a worker and reduce it to plot data."""
+    case, fluids, isolines, units, qt, cache = job
+    tables = case_tables(case, cache=cache)
+    label = case.get('label')
+    data = {'label': None if label is None else label.format(**tables['record']), 'record': tables['record'],
+            'lines': {fluid: process_lines(tables, fluid, isolines, units) for fluid in fluids}}
+    if qt and tables['streams']['component_names']:
+        data['qt'] = pinch_analysis(tables['results']['Connection'], **tables['streams'])
+    return data
+
+
+def compute_cases(cases, fluids, isolines=DEFAULT_ISOLINES, units=None, qt=True, workers=None, cache=None):
+    """
+    Compute the process lines and QT profiles of many cases in a process pool.
+
+    Args:
+        cases (list): Dicts holding either solved ``tables`` or ``model``, ``mode``,
+            ``Tsto_in``, ``Tsto_out`` and ``Tenv`` of a case to solve. An optional
+            ``label`` is used in the legends, it is formatted with the case's record,
+            e.g. 'Tenv = 10 °C, COP = {COP:.2f}'.
+        fluids (list): Fluids to calculate process lines for.
+        isolines (dict, optional): Isolines of the diagram backdrops.
+        units (dict, optional): Unit system of the diagrams.
+        qt (bool, optional): Also compute the heat exchanger profiles. Default True.
+        workers (int, optional): Number of processes, ``1`` computes in-process.
+        cache (ResultCache, optional): Read solved cases from, and store new ones in, this cache.
+
+    Returns:
+        list: Plot data per case, in the order of ``cases``.
+    """
+    # the backdrops are built here once, the workers only load them
+    for fluid in fluids:
+        get_diagram(fluid, isolines, units)
+    jobs = [(case, fluids, isolines, units, qt, cache) for case in cases]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [_case_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_case_job, jobs))
+
+
+def _draw_diagram(ax, fig, spec, cases, isolines, units):
+    """Draw the isoline backdrop and the process lines of all cases into one axis."""
+    fluid, view = spec['fluid'], spec['view']
+    x, y, xlabel, ylabel = AXES[view]
+    get_diagram(fluid, isolines, units).draw_isolines(fig, ax, view, *spec['limits'])
+    for text in ax.texts:
+        text.set_fontsize(10)
+    colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, len(cases)))
+    for color, case in zip(colors, cases):
+        for datapoints in case['lines'][fluid].values():
+            ax.plot(datapoints[x], datapoints[y], color=color, linewidth=2)
+        ax.plot([], [], color=color, label=case['label'])
+    ax.set_xlabel(xlabel, fontsize=16)
+    ax.set_ylabel(ylabel, fontsize=16)
+
+
+def _draw_qt(ax, case):
+    """Draw the T-Q profiles of all heat exchangers of one case."""
+    colors = matplotlib.colormaps['tab10'](np.arange(len(case['qt']['profiles'])) % 10)
+    for color, component, profile in zip(colors, case['qt']['summary']['component'], case['qt']['profiles']):
+        ax.plot(profile['Q'], profile['T_hot'], color=color, linestyle='-', label=f"{component} - Hot side")
+        ax.plot(profile['Q'], profile['T_cold'], color=color, linestyle='--', label=f"{component} - Cold side")
+    ax.set_xlabel('Q [kW]', fontsize=16)
+    ax.set_ylabel('T [°C]', fontsize=16)
+    ax.grid(True)
+
+
+def _render_job(job):
+    """Render a batch of figures with the Agg backend and save them."""
+    specs, isolines, units, dpi = job
+    for spec, cases in specs:
+        fig = Figure(figsize=(20, 10))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        if spec['view'] == 'QT':
+            _draw_qt(ax, cases[0])
+        else:
+            _draw_diagram(ax, fig, spec, cases, isolines, units)
+        ax.set_title(spec.get('title', ''), fontsize=20)
+        ax.legend(title=spec.get('legend'), fontsize=12)
+        ax.tick_params(labelsize=12)
+        fig.tight_layout()
+        fig.savefig(spec['path'], dpi=dpi)
+    return [spec['path'] for spec, _ in specs]
+
+
+def render(data, figures, isolines=DEFAULT_ISOLINES, units=None, workers=None, dpi=150):
+    """
+    Render figures from computed case data in a process pool.
+
+    The figures are split into one batch per worker, every worker draws and saves
+    its batch without a display.
+
+    Args:
+        data (list): Plot data per case as returned by ``compute_cases``.
+        figures (list): Dicts with ``view`` (one of VIEWS), ``path`` and optional
+            ``title``, ``legend`` and ``cases`` (indices into ``data``, default all).
+            Diagram views need ``fluid`` and ``limits`` (x_min, x_max, y_min, y_max),
+            a QT view shows the first of its cases.
+        isolines (dict, optional): Isolines of the diagram backdrops.
+        units (dict, optional): Unit system of the diagrams.
+        workers (int, optional): Number of processes, ``1`` renders in-process.
+        dpi (int, optional): Resolution of the saved figures.
+
+    Returns:
+        list: Paths of the saved figures.
+    """
+    specs = []
+    for spec in figures:
+        if spec['view'] not in VIEWS:
+            raise ValueError(f"Unknown view '{spec['view']}', choose from {VIEWS}.")
+        os.makedirs(os.path.dirname(spec['path']) or '.', exist_ok=True)
+        specs.append((spec, [data[i] for i in spec.get('cases', range(len(data)))]))
+
+    workers = min(workers or os.cpu_count(), len(specs)) or 1
+    jobs = [(batch, isolines, units, dpi) for batch in split_chains(specs, workers)]
+    if workers == 1:
+        return [path for job in jobs for path in _render_job(job)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [path for paths in pool.map(_render_job, jobs) for path in paths]
+
+
+def plot_cases(cases, diagrams, path, title='', legend=None, qt=True, isolines=DEFAULT_ISOLINES,
+               units=None, workers=None, cache=None, fmt='png'):
+    """
+    Compute and render the standard figure set of a list of cases.
+
+    Every diagram overlays all cases, the QT view is drawn once per case.
+
+    Args:
+        cases (list): Cases as accepted by ``compute_cases``.
+        diagrams (list): Dicts with ``fluid``, ``view`` ('logph' or 'Ts') and ``limits``.
+        path (str): Directory of the figures.
+        title (str, optional): Title prefix of the figures.
+        legend (str, optional): Legend title of the diagrams.
+        qt (bool, optional): Also render the QT view of every case. Default True.
+        fmt (str, optional): File format of the figures. Default is 'png'.
+
+    Other arguments are passed on to ``compute_cases`` and ``render``.
+
+    Returns:
+        list: Paths of the saved figures.
+    """
+    units = units or DEFAULT_UNITS
+    fluids = sorted({spec['fluid'] for spec in diagrams})
+    data = compute_cases(cases, fluids, isolines=isolines, units=units, qt=qt, workers=workers, cache=cache)
+    for i, case in enumerate(data):
+        if case['label'] is None:
+            case['label'] = f"Case {i + 1}"
+
+    figures = [dict(spec, title=f"{title} {spec['view']} {spec['fluid']}".strip(), legend=legend,
+                    path=os.path.join(path, f"{spec['view']}_{spec['fluid']}.{fmt}"))
+               for spec in diagrams]
+    if qt:
+        figures += [{'view': 'QT', 'cases': [i], 'title': f"{title} QT {case['label']}".strip(),
+                     'path': os.path.join(path, f"QT_{i + 1}.{fmt}")}
+                    for i, case in enumerate(data) if 'qt' in case]
+    return render(data, figures, isolines=isolines, units=units, workers=workers)
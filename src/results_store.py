@@ -0,0 +1,112 @@
+import os
+
+import pandas as pd
+
+from pinch import connection_fluid
+
+CONNECTION_COLUMNS = ['T', 'p', 'h', 's', 'm']
+COMPONENT_COLUMNS = ['Q', 'P', 'E_F', 'E_P', 'E_D', 'y_D', 'epsilon']
+
+# Key and value columns of the long-format tables
+LONG_TABLES = {
+    'connections': (['mode', 'label', 'fluid'], CONNECTION_COLUMNS),
+    'components': (['mode', 'component'], COMPONENT_COLUMNS),
+}
+
+
+def extract(tables, mode):
+    """
+    Reduce the result tables of one solve to long-format connection and component rows.
+
+    Args:
+        tables (dict): Result tables as returned by ``sweep.solve_tables``.
+        mode (str): 'charging' or 'discharging'.
+
+    Returns:
+        tuple: Connection states (mode, label, fluid, T, p, h, s, m) and component
+        KPIs (mode, component, Q, P, E_F, E_P, E_D, y_D, epsilon) as DataFrames. The
+        exergy of the bus conversions is added as rows '<component> (bus)'.
+    """
+    conns = tables['results']['Connection']
+    connections = conns[CONNECTION_COLUMNS].astype(float).rename_axis('label').reset_index()
+    connections.insert(1, 'fluid', [connection_fluid(conns, label) for label in conns.index])
+
+    # component result tables hold Q or P, bus tables are recognised by their 'bus value'
+    duty = [df.reindex(columns=['Q', 'P']) for df in tables['results'].values()
+            if df is not conns and 'bus value' not in df.columns]
+    exergy = ['E_F', 'E_P', 'E_D', 'y_Dk', 'epsilon']
+    components = pd.concat(duty).join(tables['exergy']['components'][exergy], how='outer')
+    busses = tables['exergy']['busses'][exergy].rename(index=lambda label: f"{label} (bus)")
+    components = pd.concat([components, busses]).rename(columns={'y_Dk': 'y_D'})
+    components = components[COMPONENT_COLUMNS].astype(float).rename_axis('component').reset_index()
+
+    connections.insert(0, 'mode', mode)
+    components.insert(0, 'mode', mode)
+    return connections, components
+
+
+class ResultsStore:
+    """
+    Columnar Parquet store of a sweep.
+
+    ``points.parquet`` holds one row of scalar KPIs per sweep point,
+    ``connections.parquet`` and ``components.parquet`` the long-format states and
+    component KPIs, all linked by the ``Iteration`` column. Writing needs pyarrow
+    (or fastparquet) installed.
+
+    Args:
+        path (str): Directory of the store.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _file(self, table):
+        return os.path.join(self.path, f"{table}.parquet")
+
+    def write(self, points, connections=None, components=None):
+        """Write the tables of a sweep in bulk, replacing an existing store."""
+        for table, df in (('points', points), ('connections', connections), ('components', components)):
+            if df is not None:
+                self.write_table(table, df)
+
+    def write_table(self, table, df):
+        """Write one table ('points', 'connections' or 'components'), replacing it."""
+        os.makedirs(self.path, exist_ok=True)
+        if df.empty and table in LONG_TABLES:
+            # without any converged solve the table still has the columns the readers filter on
+            keys, values = LONG_TABLES[table]
+            df = df.reindex(columns=['Iteration', *keys, *values]).astype(
+                {'Iteration': 'int64', **{column: 'object' for column in keys},
+                 **{column: 'float64' for column in values}})
+        df.to_parquet(self._file(table), index=False)
+
+    def points(self):
+        """Scalar KPIs, one row per sweep point."""
+        return pd.read_parquet(self._file('points'))
+
+    def connections(self, iteration=None, mode=None):
+        """
+        Connection states of the store.
+
+        Args:
+            iteration (int, optional): Sweep point to select.
+            mode (str, optional): 'charging' or 'discharging'.
+
+        Returns:
+            pd.DataFrame: Long table, or, if both ``iteration`` and ``mode`` are given,
+            the states of that solve indexed by connection label as expected by
+            ``pinch_analysis``/``qt_diagram_multiple``.
+        """
+        filters = [(key, '==', value) for key, value in (('Iteration', iteration), ('mode', mode))
+                   if value is not None]
+        df = pd.read_parquet(self._file('connections'), filters=filters or None)
+        if iteration is not None and mode is not None:
+            return df.set_index('label').drop(columns=['Iteration', 'mode'])
+        return df
+
+    def components(self, iteration=None, mode=None):
+        """Component KPIs of the store, optionally of one sweep point and mode."""
+        filters = [(key, '==', value) for key, value in (('Iteration', iteration), ('mode', mode))
+                   if value is not None]
+        return pd.read_parquet(self._file('components'), filters=filters or None)
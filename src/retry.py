@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from CoolProp.CoolProp import PropsSI as PSI
+
+from cache import result_tables
+from sweep import evaluate, exergy_analysis, failed_record, point_key, solve_tables
+from system import BOUNDARY, ModelSystem
+
+# Retry strategies in the order they are tried after the plain solve failed
+STRATEGIES = ('neighbour', 'relaxed', 'homotopy')
+
+# Strategies starting from saved solutions, without them nothing is stashed
+STASHED = ('neighbour', 'homotopy')
+
+
+def classify(tables=None, error=None):
+    """
+    Failure class of a solve.
+
+    The status is the one of ``instrument.status``, taken by ``sweep.solve_tables``
+    right after the solve, before any postprocessing of the results.
+
+    Returns:
+        str: 'exception:<type>' if the solver raised, otherwise the TESPy status of the
+        network, 'singular', 'no_progress', 'max_iter' or 'not_converged'.
+    """
+    if error is not None:
+        return f"exception:{type(error).__name__}"
+    return tables['record'].get('status', 'not_converged')
+
+
+def _cycle(network):
+    """Connections of the working fluid loop, in flow direction from the cycle closer."""
+    outlets = {(row.source.label, row.source_id): row.object for row in network.conns.itertuples()}
+    closer = next(comp for comp in network.comps['object'] if type(comp).__name__ == 'CycleCloser')
+    loop = [outlets[(closer.label, 'out1')]]
+    while loop[-1].target is not closer:
+        loop.append(outlets[(loop[-1].target.label, loop[-1].target_id.replace('in', 'out'))])
+    return loop
+
+
+def seed_cycle(network):
+    """
+    Set starting values of the working fluid loop from its specifications.
+
+    The set pressures are carried along the loop through components with a set
+    pressure ratio, the enthalpy of a connection with set temperature is taken at
+    that pressure. Connections with set pressure or enthalpy keep their values.
+
+    Returns:
+        list: Labels of the connections that got starting values.
+    """
+    loop = _cycle(network)
+    fluids = [fluid for conn in loop for fluid, share in conn.fluid.val.items() if conn.fluid.is_set and share == 1]
+    pressures = {i: conn.p.val for i, conn in enumerate(loop) if conn.p.is_set}
+    if not pressures:
+        return []
+
+    # pressure ratio from connection i to i + 1, None if the component changes the pressure freely
+    ratios = []
+    for conn in loop:
+        comp, port = conn.target, conn.target_id.replace('in', '')
+        ratio = getattr(comp, f"pr{port}", getattr(comp, 'pr', None))
+        ratios.append(1.0 if type(comp).__name__ == 'CycleCloser' else
+                      ratio.val if ratio is not None and ratio.is_set else None)
+    n = len(loop)
+    for _ in range(n):
+        for i in range(n):
+            j = (i + 1) % n
+            if i in pressures and j not in pressures and ratios[i] is not None:
+                pressures[j] = pressures[i] * ratios[i]
+            elif j in pressures and i not in pressures and ratios[i] is not None:
+                pressures[i] = pressures[j] / ratios[i]
+
+    seeded = []
+    for i, p in pressures.items():
+        conn = loop[i]
+        if not conn.p.is_set:
+            conn.set_attr(p0=p)
+            seeded.append(conn.label)
+        if conn.T.is_set and not conn.h.is_set and fluids:
+            try:
+                conn.set_attr(h0=PSI('H', 'P', p * 1e5, 'T', conn.T.val + 273.15, fluids[0]) / 1e3)
+            except ValueError:
+                continue
+            seeded.append(conn.label)
+    return sorted(set(seeded))
+
+
+class RetryLadder:
+    """
+    Retry strategies for points that do not converge.
+
+    After the plain solve of a mode fails, the ladder tries
+
+    - ``neighbour``: start from the saved solution of the nearest converged point,
+    - ``relaxed``: a new network with starting values seeded from the specifications of
+      the working fluid loop (see ``seed_cycle``) and ``max_iter`` iterations,
+    - ``homotopy``: walk from the nearest converged point to the target in steps of
+      the boundary temperatures, halving a step that does not converge up to
+      ``bisections`` times.
+
+    If ``neighbour`` or ``homotopy`` are tried, converged solves are saved to
+    ``stash`` as the neighbours of later points, only the ``keep`` most recent per
+    model and mode are kept. The ladder only holds paths and settings, so it can be
+    passed to worker processes which then share the stash. A temporary stash is
+    removed by ``close``.
+
+    Args:
+        stash (str, optional): Directory of the saved solutions, a temporary directory by default.
+        strategies (tuple, optional): Strategies to try, default STRATEGIES.
+        neighbours (int, optional): Number of nearest converged points tried. Default is 3.
+        max_iter (int, optional): Iteration limit of the relaxed solve. Default is 150.
+        bisections (int, optional): Step halvings of the homotopy. Default is 4.
+        keep (int, optional): Saved solutions kept per model and mode. Default is 50.
+    """
+
+    def __init__(self, stash=None, strategies=STRATEGIES, neighbours=3, max_iter=150, bisections=4, keep=50):
+        unknown = set(strategies) - set(STRATEGIES)
+        if unknown:
+            raise ValueError(f"Unknown strategies {sorted(unknown)}, choose from {STRATEGIES}.")
+        self._temporary = stash is None
+        self.stash = stash or tempfile.mkdtemp(prefix='carnot_stash_')
+        self.strategies = tuple(strategies)
+        self.stashing = any(strategy in STASHED for strategy in self.strategies)
+        self.neighbours = neighbours
+        self.max_iter = max_iter
+        self.bisections = bisections
+        self.keep = keep
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Remove the stash if it is a temporary directory."""
+        if self._temporary:
+            shutil.rmtree(self.stash, ignore_errors=True)
+            self._temporary = False
+
+    def path(self, model, mode, point):
+        """Directory of the saved solution of a point."""
+        key = hashlib.sha256(point_key(point).encode()).hexdigest()[:16]
+        return os.path.join(self.stash, model, mode, key)
+
+    def save(self, model, mode, point, network=None):
+        """Save a converged network with its point, only the point if the network is already saved."""
+        path = self.path(model, mode, point)
+        if network is not None:
+            network.save(path)
+        with open(os.path.join(path, 'point.json'), 'w') as f:
+            json.dump(point, f, default=float)
+        self.prune(model, mode)
+
+    def prune(self, model, mode):
+        """Remove the oldest saved solutions of a model and mode beyond ``keep``."""
+        directory = os.path.join(self.stash, model, mode)
+        saved = []
+        for name in os.listdir(directory):
+            try:
+                saved.append((os.path.getmtime(os.path.join(directory, name, 'point.json')), name))
+            except OSError:
+                # not finished saving, or removed by another worker
+                continue
+        for _, name in sorted(saved, reverse=True)[self.keep:]:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    def nearest(self, model, mode, point):
+        """
+        Saved converged points of the same parameters, nearest boundary temperatures first.
+
+        Returns:
+            list: (point, path) tuples, at most ``neighbours``.
+        """
+        directory = os.path.join(self.stash, model, mode)
+        params = {key: value for key, value in point.items() if key not in BOUNDARY}
+        candidates = []
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            try:
+                with open(os.path.join(directory, name, 'point.json')) as f:
+                    other = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if other == point or {key: value for key, value in other.items() if key not in BOUNDARY} != params:
+                continue
+            distance = sum((other[key] - point[key]) ** 2 for key in BOUNDARY)
+            candidates.append((distance, other, os.path.join(directory, name)))
+        return [(other, path) for _, other, path in sorted(candidates, key=lambda c: c[0])[:self.neighbours]]
+
+    def solve(self, model, mode, point, pamb=1, Tamb=10, cache=None, system=None):
+        """
+        Solve one mode of a point, climbing the ladder if the plain solve fails.
+
+        Args:
+            model (str): One of MODELS.
+            mode (str): 'charging' or 'discharging'.
+            point (dict): Boundary temperatures and component/connection parameters.
+            cache (ResultCache, optional): Cache read first and updated with retried solves.
+            system (ModelSystem, optional): Warm network of a continuation chain.
+
+        Returns:
+            dict: Result tables as of ``sweep.solve_tables``. The record holds the
+            ``strategy`` that converged ('default' for the plain solve, None if all
+            failed) and the ``failure`` class of the plain solve.
+        """
+        boundary = {key: point[key] for key in BOUNDARY}
+        params = {key: value for key, value in point.items() if key not in BOUNDARY}
+        save_path = self.path(model, mode, point) if self.stashing else None
+        tables, error = None, None
+        try:
+            tables = solve_tables(model, mode, **boundary, pamb=pamb, Tamb=Tamb, cache=cache, system=system,
+                                  save_path=save_path, params=params)
+        except Exception as e:
+            error = e
+        if tables is not None and tables['record']['converged']:
+            # solves read from the cache were not saved and cannot serve as neighbours
+            if save_path is not None and os.path.isdir(save_path):
+                self.save(model, mode, point)
+            tables['record'].setdefault('strategy', 'default')
+            tables['record'].setdefault('failure', None)
+            return tables
+
+        if save_path is not None and not os.path.isfile(os.path.join(save_path, 'point.json')):
+            # saved before the result tables raised, it is no neighbour
+            shutil.rmtree(save_path, ignore_errors=True)
+        failure = classify(tables, error)
+        for strategy in self.strategies:
+            try:
+                solved = getattr(self, f"_{strategy}")(model, mode, point, params)
+            except Exception:
+                solved = None
+            if solved is None:
+                continue
+            ean = exergy_analysis(solved.network, solved.ep, solved.ef, solved.el, pamb=pamb, Tamb=Tamb)
+            tables = result_tables(solved.network, ean, evaluate(model, mode, solved.network, solved.ep, solved.ef,
+                                                                 ean))
+            tables['record'].update(strategy=strategy, failure=failure)
+            if self.stashing:
+                self.save(model, mode, point, solved.network)
+            if cache is not None:
+                cache.put(cache.key(model, mode, dict(boundary, pamb=pamb, Tamb=Tamb), params), model, tables)
+            return tables
+
+        if tables is None:
+            tables = {'record': failed_record(None, mode, status='error')}
+        tables['record'].update(strategy=None, failure=failure)
+        return tables
+
+    def _neighbour(self, model, mode, point, params):
+        for _, path in self.nearest(model, mode, point):
+            system = ModelSystem(model, mode, **{key: point[key] for key in BOUNDARY}, params=params)
+            if system.solve(init_path=path, init_previous=False):
+                return system
+        return None
+
+    def _relaxed(self, model, mode, point, params):
+        system = ModelSystem(model, mode, **{key: point[key] for key in BOUNDARY}, params=params)
+        if not seed_cycle(system.network):
+            return None
+        return system if system.solve(init_previous=False, max_iter=self.max_iter) else None
+
+    def _homotopy(self, model, mode, point, params):
+        nearest = self.nearest(model, mode, point)
+        if not nearest:
+            return None
+        start, path = nearest[0]
+        system = ModelSystem(model, mode, **{key: start[key] for key in BOUNDARY}, params=params)
+
+        # every step starts from the last converged state, a diverged step is halved
+        last = tempfile.mkdtemp(prefix='carnot_homotopy_')
+        try:
+            t, step, halvings = 0.0, 1.0, 0
+            while t < 1:
+                trial = min(1.0, t + step)
+                system.set_boundary(**{key: start[key] + trial * (point[key] - start[key]) for key in BOUNDARY})
+                if system.solve(init_path=path, init_previous=False):
+                    t = trial
+                    system.network.save(last)
+                    path = last
+                    continue
+                halvings += 1
+                if halvings > self.bisections:
+                    return None
+                step /= 2
+            return system
+        finally:
+            shutil.rmtree(last, ignore_errors=True)
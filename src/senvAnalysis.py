@@ -3,10 +3,17 @@ import pandas as pd
 from tespy.networks import Network
 from tespy.tools import ExergyAnalysis
 
+from results_store import ResultsStore
+
 def plot_sensitivity_from_df(df, param, filename_prefix):
     """
     Plots charging and discharging performance indicators from results DataFrame.
+
+    ``df`` may also be the path of a results store written by ``run_sweep``.
     """
+    if isinstance(df, str):
+        df = ResultsStore(df).points()
+
     # --- Charging Plot: COP & eps_char ---
     fig1, ax1 = plt.subplots()
 
@@ -42,3 +49,44 @@ def plot_sensitivity_from_df(df, param, filename_prefix):
     plt.tight_layout()
     fig2.savefig(f"{filename_prefix}_{param}_discharging_model2_ihx.png")
     plt.show()
+
+
+def plot_sobol_indices(indices, filename_prefix):
+    """
+    Plots first-order and total Sobol indices per output as grouped bars.
+
+    ``indices`` is the DataFrame returned by ``doe.sensitivity``.
+    """
+    for output, df in indices.groupby("output", sort=False):
+        fig, ax = plt.subplots()
+        x = range(len(df))
+        ax.bar([i - 0.2 for i in x], df["S1"], width=0.4, label="First order $S_1$")
+        ax.bar([i + 0.2 for i in x], df["ST"], width=0.4, label="Total $S_T$")
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(df["parameter"], rotation=45, ha="right")
+        ax.set_ylabel("Sobol index [-]")
+        ax.legend()
+
+        plt.title(f"Global Sensitivity – {output}")
+        plt.tight_layout()
+        fig.savefig(f"{filename_prefix}_{output}_sobol.png")
+        plt.show()
+
+
+def plot_pareto_fronts(fronts, filename):
+    """
+    Plots the Pareto fronts of several models on shared axes.
+
+    ``fronts`` is the DataFrame returned by ``pareto.pareto_fronts``.
+    """
+    fig, ax = plt.subplots()
+    for model, df in fronts.groupby("model", sort=False):
+        ax.plot(df["specific investment"], df["RTE"], marker="o", label=model)
+    ax.set_xlabel("Specific investment [€/kW]")
+    ax.set_ylabel("Round-trip efficiency [%]")
+    ax.legend()
+
+    plt.title("Pareto fronts")
+    plt.tight_layout()
+    fig.savefig(filename)
+    plt.show()
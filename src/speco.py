@@ -0,0 +1,291 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve
+
+from sweep import solve_tables
+from system import BOUNDARY
+
+# Purchased equipment cost PEC = a * X ** b in € per component class, with the size X
+# being the power in kW ('P') or the heat transfer area in m² ('A'). Default
+# coefficients for a first estimate, replace them with project specific data.
+COST_FUNCTIONS = {
+    'Compressor': ('P', 10167.5, 0.46),
+    'Turbine': ('P', 4405.0, 0.7),
+    'Pump': ('P', 3540.0, 0.71),
+    'HeatExchanger': ('A', 1397.0, 0.89),
+    'Condenser': ('A', 1397.0, 0.89),
+}
+
+# Overall heat transfer coefficient in W/m²K turning the sized UA (or Q / LMTD) into an area
+HEAT_TRANSFER_COEFFICIENTS = {'HeatExchanger': 1000.0, 'Condenser': 1500.0}
+
+
+def crf(interest, lifetime):
+    """Capital recovery factor of an annuity."""
+    q = (1 + interest) ** lifetime
+    return interest * q / (q - 1)
+
+
+def component_classes(tables):
+    """Class name of every component with a results table, by label."""
+    return {label: key for key, df in tables['results'].items()
+            if key != 'Connection' and 'bus value' not in df.columns for label in df.index}
+
+
+def _column(tables, key, label, column):
+    """One result value of a component across many solves."""
+    return np.array([t['results'][key].loc[label, column] for t in tables], dtype=float)
+
+
+def purchased_equipment_cost(tables, cost_functions=COST_FUNCTIONS, U=None):
+    """
+    Purchased equipment cost of the components.
+
+    Args:
+        tables (list): Result tables of many solves of one model and mode.
+        cost_functions (dict, optional): (size, a, b) per component class, see COST_FUNCTIONS.
+        U (dict, optional): Heat transfer coefficient in W/m²K per component class or label,
+            overriding HEAT_TRANSFER_COEFFICIENTS.
+
+    Returns:
+        dict: PEC in € per component label, arrays over the solves.
+    """
+    U = dict(HEAT_TRANSFER_COEFFICIENTS, **(U or {}))
+    PEC = {}
+    for label, key in component_classes(tables[0]).items():
+        if key not in cost_functions:
+            continue
+        size, a, b = cost_functions[key]
+        if size == 'P':
+            X = np.abs(_column(tables, key, label, 'P')) / 1e3
+        elif label in tables[0]['sizing']['summary']['component']:
+            # segment-wise UA resolves the phase change zones of condensers and evaporators
+            X = np.array([t['sizing']['summary']['UA'][list(t['sizing']['summary']['component']).index(label)]
+                          for t in tables]) / U.get(label, U[key])
+        else:
+            X = np.abs(_column(tables, key, label, 'Q')) / (U.get(label, U[key]) * _column(tables, key, label, 'td_log'))
+        PEC[label] = a * X ** b
+    return PEC
+
+
+def investment_cost_rates(tables, cost_functions=COST_FUNCTIONS, U=None, interest=0.05, lifetime=20,
+                          om=0.02, hours=2000):
+    """
+    Levelized investment and O&M cost rates of the components.
+
+    Args:
+        tables (list): Result tables of many solves of one model and mode.
+        cost_functions, U: See ``purchased_equipment_cost``.
+        interest (float, optional): Interest rate. Default is 0.05.
+        lifetime (float, optional): Economic lifetime in years. Default is 20.
+        om (float, optional): Yearly O&M cost as fraction of the PEC. Default is 0.02.
+        hours (float, optional): Operating hours per year of this mode. Default is 2000.
+
+    Returns:
+        dict: Cost rate Z in €/h per component label, arrays over the solves.
+    """
+    factor = (crf(interest, lifetime) + om) / hours
+    return {label: PEC * factor for label, PEC in purchased_equipment_cost(tables, cost_functions, U).items()}
+
+
+def speco(tables, c_el=0.3, source_costs=None, Z=None, **kwargs):
+    """
+    SPECO cost balance of many solves of the same model and mode.
+
+    Every component yields a cost balance ``sum C_out + C_W,out = sum C_in + C_W,in + Z``
+    on the physical exergy of its streams, with the auxiliary equations
+
+    - heat exchangers: F rule on the side losing more exergy (c_out = c_in),
+    - turbines: F rule on the working fluid, the power output takes the remainder,
+    - other components with several outputs: equal specific cost of all outputs.
+
+    Power consumed by compressors and pumps is bought at ``c_el``, streams leaving a
+    source cost ``source_costs`` (0 by default, e.g. ambient air). The balances of all
+    solves form one block diagonal sparse system that is solved at once.
+
+    Args:
+        tables (list): Result tables of one model and mode, e.g. from ``sweep.solve_tables``.
+        c_el (float, optional): Specific cost of purchased electricity in €/kWh.
+        source_costs (dict, optional): Specific cost in €/kWh of exergy by connection label,
+            e.g. the charging product cost for the hot storage stream of discharging.
+        Z (dict, optional): Component cost rates in €/h, default ``investment_cost_rates``
+            called with the remaining keyword arguments.
+
+    Returns:
+        dict: ``connections`` labels with cost rates ``C`` [€/h] and specific costs ``c``
+        [€/kWh] of shape (n, J); ``components`` labels with ``Z``, ``C_F``, ``C_P``,
+        ``c_F``, ``c_P``, ``C_D``, ``f`` and ``r`` of shape (n, K); ``power`` labels of the
+        power producers with ``C_W`` and ``c_W``; the system product cost ``c_P_total``
+        in €/kWh of exergy, shape (n,).
+    """
+    tables = list(tables)
+    n, first = len(tables), tables[0]
+    source_costs = source_costs or {}
+    Z = investment_cost_rates(tables, **kwargs) if Z is None else Z
+    classes = component_classes(first)
+    conns = list(first['results']['Connection'].index)
+    index = {label: j for j, label in enumerate(conns)}
+    E = np.array([t['exergy']['connections'].loc[conns, 'E_PH'].to_numpy(float) for t in tables]) / 1e3
+
+    def power(label):
+        key = classes.get(label)
+        if key is None or 'P' not in first['results'][key].columns:
+            return np.zeros(n)
+        return _column(tables, key, label, 'P') / 1e3
+
+    ports = first['ports']
+    P = {label: power(label) for label in ports}
+    producers = [label for label in ports if P[label][0] < 0]
+    for i, label in enumerate(producers):
+        index[label] = len(conns) + i
+    m = len(conns) + len(producers)
+
+    rows, cols, vals, rhs = [], [], [], np.zeros((n, m))
+    row = 0
+
+    def add(col, value):
+        rows.append(row)
+        cols.append(index[col])
+        vals.append(np.broadcast_to(value, (n,)))
+
+    def output_exergy(col):
+        return -P[col] if col in P else E[:, index[col]]
+
+    for label, port in ports.items():
+        inlets, outlets = port['inlets'], port['outlets']
+        if not inlets:
+            for conn in outlets:
+                add(conn, 1.0)
+                rhs[:, row] = source_costs.get(conn, 0) * E[:, index[conn]]
+                row += 1
+            continue
+        if not outlets:
+            continue
+
+        # cost balance
+        for conn in outlets:
+            add(conn, 1.0)
+        for conn in inlets:
+            add(conn, -1.0)
+        if label in producers:
+            add(label, 1.0)
+        rhs[:, row] = Z.get(label, 0) + c_el * np.maximum(P[label], 0)
+        row += 1
+
+        # auxiliary equations, E_in * C_out - E_out * C_in = 0 is c_out = c_in without division
+        if len(inlets) == len(outlets) == 2:
+            loss = [E[:, index[i]] - E[:, index[o]] for i, o in zip(inlets, outlets)]
+            fuel = [loss[0] >= loss[1], loss[0] < loss[1]]
+            for side, (i, o) in enumerate(zip(inlets, outlets)):
+                add(o, fuel[side] * E[:, index[i]])
+                add(i, -E[:, index[o]] * fuel[side])
+            row += 1
+        elif label in producers and len(inlets) == len(outlets) == 1:
+            add(outlets[0], E[:, index[inlets[0]]])
+            add(inlets[0], -E[:, index[outlets[0]]])
+            row += 1
+        else:
+            products = outlets + ([label] if label in producers else [])
+            for a, b in zip(products, products[1:]):
+                add(a, output_exergy(b))
+                add(b, -output_exergy(a))
+                row += 1
+
+    if row != m:
+        raise ValueError(f"The cost balance has {row} equations for {m} unknown cost rates.")
+
+    # block diagonal system of all solves
+    offset = (np.arange(n) * m)[:, None]
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    A = csr_matrix((np.stack(vals, axis=1).ravel(), ((offset + rows).ravel(), (offset + cols).ravel())),
+                   shape=(n * m, n * m))
+    C = spsolve(A, rhs.ravel()).reshape(n, m)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = {
+            'connections': conns,
+            'C': C[:, :len(conns)],
+            'c': np.where(E != 0, C[:, :len(conns)] / E, np.nan),
+            'power': producers,
+            'C_W': C[:, len(conns):],
+            'c_W': C[:, len(conns):] / -np.array([P[label] for label in producers]).reshape(len(producers), n).T,
+        }
+        result.update(_component_costs(tables, ports, producers, P, C, E, index, Z, c_el))
+
+        C_F_total = sum(C[:, index[conn]] for label, port in ports.items() if not port['inlets']
+                        for conn in port['outlets']) + c_el * sum(np.maximum(p, 0) for p in P.values())
+        E_P_total = np.array([t['exergy']['network']['E_P'] for t in tables]) / 1e3
+        result['c_P_total'] = (C_F_total + sum(Z.values())) / E_P_total
+    return result
+
+
+def _component_costs(tables, ports, producers, P, C, E, index, Z, c_el):
+    """Fuel and product cost rates and the exergoeconomic variables of the components."""
+    exergy = tables[0]['exergy']['components']
+    labels = [label for label in exergy.index if label in ports]
+    E_F = np.array([t['exergy']['components'].loc[labels, 'E_F'].to_numpy(float) for t in tables]) / 1e3
+    E_P = np.array([t['exergy']['components'].loc[labels, 'E_P'].to_numpy(float) for t in tables]) / 1e3
+    E_D = np.array([t['exergy']['components'].loc[labels, 'E_D'].to_numpy(float) for t in tables]) / 1e3
+
+    def stream(conn):
+        return C[:, index[conn]]
+
+    C_F, C_P = np.full(E_F.shape, np.nan), np.full(E_F.shape, np.nan)
+    for k, label in enumerate(labels):
+        inlets, outlets = ports[label]['inlets'], ports[label]['outlets']
+        C_in = sum(stream(conn) for conn in inlets)
+        C_out = sum(stream(conn) for conn in outlets)
+        if label in producers:
+            C_F[:, k] = C_in - C_out
+            C_P[:, k] = C[:, index[label]]
+        elif np.any(P[label] > 0):
+            C_F[:, k] = c_el * P[label]
+            C_P[:, k] = C_out - C_in
+        elif len(inlets) == len(outlets) == 2:
+            loss = [E[:, index[i]] - E[:, index[o]] for i, o in zip(inlets, outlets)]
+            fuel = loss[0] >= loss[1]
+            side = [stream(i) - stream(o) for i, o in zip(inlets, outlets)]
+            C_F[:, k] = np.where(fuel, side[0], side[1])
+            C_P[:, k] = -np.where(fuel, side[1], side[0])
+        else:
+            C_F[:, k] = C_in - C_out
+
+    Z_k = np.array([np.broadcast_to(Z.get(label, 0), (len(tables),)) for label in labels]).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c_F, c_P = C_F / E_F, C_P / E_P
+        C_D = c_F * E_D
+        return {'components': labels, 'Z': Z_k, 'C_F': C_F, 'C_P': C_P, 'c_F': c_F, 'c_P': c_P,
+                'C_D': C_D, 'f': Z_k / (Z_k + C_D), 'r': (c_P - c_F) / c_F}
+
+
+def speco_sweep(model, mode, grid, cache=None, pamb=1, Tamb=10, **kwargs):
+    """
+    Exergoeconomic analysis of a parameter grid.
+
+    The result tables are read from ``cache`` where available (e.g. after a parallel
+    ``run_sweep`` with the same cache), missing points are solved.
+
+    Args:
+        model (str): One of MODELS.
+        mode (str): 'charging' or 'discharging'.
+        grid (list): Grid points as produced by ``make_grid``.
+        **kwargs: Passed on to ``speco``.
+
+    Returns:
+        tuple: The grid as DataFrame with the system product cost ``c_P_total`` in
+        €/kWh and the full ``speco`` result. Points that did not converge are left
+        out of ``speco``, their ``c_P_total`` is NaN and ``converged`` False.
+    """
+    tables = [solve_tables(model, mode, point['Tsto_in'], point['Tsto_out'], point['Tenv'], pamb=pamb, Tamb=Tamb,
+                           cache=cache, params={key: value for key, value in point.items() if key not in BOUNDARY})
+              for point in grid]
+    converged = np.array([t['record']['converged'] for t in tables], dtype=bool)
+    if not converged.any():
+        raise ValueError(f"No point of the grid converged for {model} {mode}.")
+    result = speco([t for t, ok in zip(tables, converged) if ok], **kwargs)
+    df = pd.DataFrame(grid)
+    df['converged'] = converged
+    df['c_P_total'] = np.nan
+    df.loc[converged, 'c_P_total'] = result['c_P_total']
+    return df, result
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+
+from doe import OUTPUTS, latin_hypercube, run_design
+from results_store import ResultsStore
+from sweep import read_checkpoint
+from system import BOUNDARY
+
+
+class GaussianProcess:
+    """
+    Gaussian process regression of one output with an anisotropic squared exponential kernel.
+
+    Inputs are expected in the unit hypercube, the output is standardised internally.
+    Length scales and signal variance are fitted by maximising the log marginal likelihood.
+
+    Args:
+        noise (float, optional): Variance of the (standardised) output noise, keeps
+            the kernel matrix well conditioned. Default is 1e-6.
+    """
+
+    def __init__(self, noise=1e-6):
+        self.noise = noise
+
+    def kernel(self, X1, X2, theta):
+        length, variance = np.exp(theta[:-1]), np.exp(theta[-1])
+        d2 = (((X1[:, None, :] - X2[None, :, :]) / length) ** 2).sum(axis=-1)
+        return variance * np.exp(-0.5 * d2)
+
+    def _nll(self, theta, X, y):
+        K = self.kernel(X, X, theta) + self.noise * np.eye(len(X))
+        try:
+            L, lower = cho_factor(K, lower=True)
+        except np.linalg.LinAlgError:
+            return np.inf
+        alpha = cho_solve((L, lower), y)
+        return 0.5 * y @ alpha + np.log(np.diag(L)).sum() + 0.5 * len(X) * np.log(2 * np.pi)
+
+    def fit(self, X, y):
+        """Fit the hyperparameters and factorise the kernel matrix of the training data."""
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.y_mean, self.y_std = y.mean(), y.std() or 1.0
+        z = (y - self.y_mean) / self.y_std
+
+        d = X.shape[1]
+        bounds = [(np.log(1e-2), np.log(1e1))] * d + [(np.log(1e-2), np.log(1e2))]
+        best = None
+        for start in (np.log(0.2), np.log(1.0)):
+            result = minimize(self._nll, np.full(d + 1, start), args=(X, z), method='L-BFGS-B', bounds=bounds)
+            if best is None or result.fun < best.fun:
+                best = result
+        self.theta = best.x
+        self.X = X
+        K = self.kernel(X, X, self.theta) + self.noise * np.eye(len(X))
+        self.L = np.linalg.cholesky(K)
+        self.alpha = cho_solve((self.L, True), z)
+        return self
+
+    def predict(self, X):
+        """
+        Posterior mean and standard deviation.
+
+        Args:
+            X (np.ndarray): Query points of shape (n, d) in the unit hypercube.
+
+        Returns:
+            tuple: Mean and standard deviation, arrays of length n.
+        """
+        K_s = self.kernel(np.atleast_2d(X), self.X, self.theta)
+        v = solve_triangular(self.L, K_s.T, lower=True)
+        variance = np.maximum(np.exp(self.theta[-1]) - (v ** 2).sum(axis=0), 0)
+        return self.y_mean + self.y_std * (K_s @ self.alpha), self.y_std * np.sqrt(variance)
+
+
+def training_data(store=None, checkpoint=None):
+    """
+    Collect solved sweep points from a results store and/or a checkpoint file.
+
+    Returns:
+        pd.DataFrame: One row per point with the converged points only.
+    """
+    frames = []
+    if store is not None:
+        frames.append(ResultsStore(store).points() if isinstance(store, str) else store.points())
+    if checkpoint is not None:
+        frames.append(pd.DataFrame([entry['record'] for entry in read_checkpoint(checkpoint).values()]))
+    df = pd.concat(frames, ignore_index=True)
+    converged = df['converged (char)'].astype(bool) & df['converged (dis)'].astype(bool)
+    return df[converged].reset_index(drop=True)
+
+
+class Surrogate:
+    """
+    Gaussian process surrogate of the KPIs of one model over its design space.
+
+    Args:
+        bounds (dict): (lower, upper) bound per input, e.g. the boundary temperatures
+            and parameters such as 'Compressor.eta_s'. Inputs are scaled by these bounds.
+        outputs (tuple, optional): Record columns to model, default COP, eta, eps_char, eps_dis.
+        noise (float, optional): Output noise variance, see ``GaussianProcess``.
+    """
+
+    def __init__(self, bounds, outputs=OUTPUTS, noise=1e-6):
+        self.bounds = dict(bounds)
+        self.outputs = tuple(outputs)
+        self.noise = noise
+        self.lower, self.upper = np.array(list(self.bounds.values()), dtype=float).T
+        self.data = None
+        self.models = {}
+
+    def scale(self, points):
+        """Map points (DataFrame, list of dicts or array in bound order) to the unit hypercube."""
+        if isinstance(points, (pd.DataFrame, list)):
+            points = pd.DataFrame(points)[list(self.bounds)].to_numpy(dtype=float)
+        return (np.atleast_2d(points) - self.lower) / (self.upper - self.lower)
+
+    def fit(self, data):
+        """
+        Train one Gaussian process per output.
+
+        Args:
+            data (pd.DataFrame): Solved points holding the inputs and outputs, e.g. from
+                ``training_data`` or ``run_sweep``.
+        """
+        self.data = data.reset_index(drop=True)
+        X = self.scale(self.data)
+        self.models = {output: GaussianProcess(self.noise).fit(X, self.data[output].to_numpy(dtype=float))
+                       for output in self.outputs}
+        return self
+
+    def predict(self, points):
+        """
+        Predict the outputs with their standard deviation.
+
+        Args:
+            points: Query points, see ``scale``.
+
+        Returns:
+            pd.DataFrame: Columns '<output>' and '<output> std' per output.
+        """
+        X = self.scale(points)
+        result = {}
+        for output, gp in self.models.items():
+            result[output], result[f"{output} std"] = gp.predict(X)
+        return pd.DataFrame(result)
+
+    def uncertainty(self, points):
+        """Standard deviation of every output relative to its training spread, summed over outputs."""
+        prediction = self.predict(points)
+        return sum(prediction[f"{output} std"].to_numpy() / gp.y_std for output, gp in self.models.items())
+
+
+def adaptive_sampling(model, surrogate, rounds=5, batch=8, candidates=2000, fixed=None, seed=None, **kwargs):
+    """
+    Refine a surrogate by solving the model where its prediction is least certain.
+
+    In every round a Latin-hypercube candidate set is scored with the surrogate, the
+    ``batch`` most uncertain candidates (kept apart from each other) are solved with
+    TESPy and added to the training data.
+
+    Args:
+        model (str): One of MODELS.
+        surrogate (Surrogate): Surrogate fitted on the initial data.
+        rounds (int, optional): Number of refinement rounds. Default is 5.
+        batch (int, optional): New solves per round. Default is 8.
+        candidates (int, optional): Candidate points scored per round. Default is 2000.
+        fixed (dict, optional): Values of boundary temperatures not in the surrogate's bounds.
+        seed (int, optional): Seed of the candidate sampling.
+        **kwargs: Passed on to ``doe.run_design`` (workers, cache, ...).
+
+    Returns:
+        Surrogate: The refitted surrogate.
+    """
+    rng = np.random.default_rng(seed)
+    missing = [key for key in BOUNDARY if key not in surrogate.bounds and key not in (fixed or {})]
+    if missing:
+        raise ValueError(f"Boundary temperature(s) {missing} need a bound or a fixed value.")
+    for _ in range(rounds):
+        pool = latin_hypercube(surrogate.bounds, candidates, seed=int(rng.integers(2 ** 32)))
+        X = surrogate.scale(pool)
+        score = surrogate.uncertainty(pool)
+        chosen = []
+        for i in np.argsort(score)[::-1]:
+            # keep the batch spread out instead of clustering at the same maximum
+            if all(np.linalg.norm(X[i] - X[j]) > 0.5 / batch for j in chosen):
+                chosen.append(i)
+            if len(chosen) == batch:
+                break
+        samples = [dict(fixed or {}, **pool[i]) for i in chosen]
+        new = run_design(model, samples, **kwargs)
+        new = new[new['converged (char)'] & new['converged (dis)']]
+        surrogate.fit(pd.concat([surrogate.data, new], ignore_index=True))
+    return surrogate
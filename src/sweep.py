@@ -0,0 +1,492 @@
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from queue import Empty, SimpleQueue
+
+import pandas as pd
+from tespy.tools import ExergyAnalysis
+
+import instrument
+from cache import result_tables
+from results_store import ResultsStore, extract
+from system import (BOUNDARY, MODES, ModelSystem, canonical, check_params, load_model, model_name, new_network,
+                    set_params)
+
+# Heat exchangers between the working fluid and the hot storage, per model family
+STORAGE_HX = {
+    'model1': {'charging': ['Condenser', 'Pre Cooler', 'Sub Cooler'],
+               'discharging': ['Preheater', 'RC Evaporator', 'Superheater']},
+    'model2': {'charging': ['Heat Exchanger Hot Storage'],
+               'discharging': ['Heat Exchanger Hot Storage']},
+}
+
+# Long-format tables of a point kept with ``detail``
+DETAIL_TABLES = ('connections', 'components')
+
+# Seconds the parent waits for a result before checking whether the workers are still alive
+POLL_INTERVAL = 1.0
+
+
+def make_grid(Tsto_in, Tsto_out, Tenv):
+    """
+    Build the full-factorial parameter grid of the storage/ambient temperatures.
+
+    Args:
+        Tsto_in (list): Storage inlet (cold) temperatures in °C.
+        Tsto_out (list): Storage outlet (hot) temperatures in °C.
+        Tenv (list): Ambient temperatures in °C.
+
+    Returns:
+        list: One dict per grid point, ordered Tsto_in > Tsto_out > Tenv.
+    """
+    return [{'Tsto_in': t_in, 'Tsto_out': t_out, 'Tenv': t_env}
+            for t_in, t_out, t_env in itertools.product(Tsto_in, Tsto_out, Tenv)]
+
+
+def order_grid(grid, keys=BOUNDARY):
+    """
+    Order grid points as a serpentine path so that neighbours differ by one step.
+
+    The innermost key runs back and forth instead of restarting at its first value,
+    which keeps the state change between consecutive solves small.
+
+    Args:
+        grid (list): Grid points (dicts).
+        keys (tuple, optional): Parameters from outermost to innermost.
+
+    Returns:
+        list: Indices into ``grid`` in continuation order.
+    """
+    levels = [sorted({point[key] for point in grid}) for key in keys]
+
+    def sort_key(i):
+        ranks = [levels[d].index(grid[i][key]) for d, key in enumerate(keys)]
+        return tuple(len(levels[d]) - 1 - rank if sum(ranks[:d]) % 2 else rank
+                     for d, rank in enumerate(ranks))
+
+    return sorted(range(len(grid)), key=sort_key)
+
+
+def performance(model, mode, network, ep, ef):
+    """
+    Compute the cycle KPI of a solved network.
+
+    Args:
+        model (str): Model name.
+        mode (str): 'charging' or 'discharging'.
+        network (Network): Solved network.
+        ep (Bus): Product bus as returned by ``create_system``.
+        ef (Bus): Fuel bus as returned by ``create_system``.
+
+    Returns:
+        dict: ``COP`` (charging) or ``eta`` in % (discharging) together with the
+        storage heat flow ``Q_sto`` and electrical power ``P_el`` in W.
+    """
+    family = model_name(model).replace('_ihx', '')
+    Q_sto = abs(sum(network.get_comp(label).Q.val for label in STORAGE_HX[family][mode]))
+    if mode == 'charging':
+        P_el = abs(ef.P.val)
+        return {'COP': Q_sto / P_el, 'Q_sto': Q_sto, 'P_el': P_el}
+    P_el = abs(ep.P.val)
+    return {'eta': 100 * P_el / Q_sto, 'Q_sto': Q_sto, 'P_el': P_el}
+
+
+def exergy_analysis(network, ep, ef, el, pamb=1, Tamb=10):
+    """Run the exergy analysis of a solved network and return the analysis object."""
+    ean = ExergyAnalysis(network=network, E_P=[ep], E_F=[ef], E_L=[el])
+    ean.analyse(pamb=pamb, Tamb=Tamb)
+    return ean
+
+
+def solve_tables(model, mode, Tsto_in, Tsto_out, Tenv, pamb=1, Tamb=10, cache=None, system=None,
+                 init_path=None, save_path=None, params=None):
+    """
+    Solve one operating mode and return its result tables.
+
+    Args:
+        model (str): Model name.
+        mode (str): 'charging' or 'discharging'.
+        Tsto_in, Tsto_out, Tenv (float): Boundary temperatures in °C.
+        pamb (float, optional): Ambient pressure for the exergy analysis in bar.
+        Tamb (float, optional): Dead state temperature in °C. Default is 10.
+        cache (ResultCache, optional): Read the result from, or store it in, this cache.
+        system (ModelSystem, optional): Re-solve this network instead of building one.
+            If the warm start diverges (see ``diverged``), it is solved again from
+            the default starting values.
+        init_path (str, optional): Saved network to take starting values from.
+        save_path (str, optional): Save the network here if it converged.
+        params (dict, optional): Component/connection parameters by '<label>.<parameter>',
+            see ``system.set_params``.
+
+    Returns:
+        dict: Tables as built by ``cache.result_tables``, the scalar results are in
+        ``record``. A solve that did not converge only has the ``record`` of
+        ``failed_record``.
+    """
+    boundary = {'Tsto_in': Tsto_in, 'Tsto_out': Tsto_out, 'Tenv': Tenv}
+    if cache is not None:
+        key = cache.key(model, mode, dict(boundary, pamb=pamb, Tamb=Tamb), params)
+        tables = cache.get(key)
+        if tables is not None:
+            return tables
+
+    if system is None:
+        network = new_network()
+        _, ep, ef, el, *_ = load_model(model).build_system(network, mode=mode, **boundary)
+        set_params(network, params, mode)
+        instrument.solve(network, 'design', {'model': model_name(model), 'mode': mode, **boundary, 'params': params},
+                         init_path=init_path)
+    else:
+        system.set_boundary(**boundary)
+        system.set_params(params)
+        if not system.solve(init_path=init_path) and diverged(system.network):
+            system.solve(init_previous=False)
+        network, ep, ef, el = system.network, system.ep, system.ef, system.el
+    # TESPy skips the postprocessing after a singular or stalled solve, the results are not usable
+    if not network.converged:
+        return {'record': failed_record(network, mode)}
+    if save_path is not None:
+        network.save(save_path)
+
+    ean = exergy_analysis(network, ep, ef, el, pamb=pamb, Tamb=Tamb)
+    tables = result_tables(network, ean, evaluate(model, mode, network, ep, ef, ean))
+    if cache is not None:
+        cache.put(key, model, tables)
+    return tables
+
+
+def diverged(network):
+    """
+    Whether a solve that did not converge ran away from its starting values.
+
+    A warm start diverged if its residual ended above the one of the first iteration
+    without the Jacobian becoming singular. A singular Jacobian, or a residual that
+    stalls below its start, mostly marks a point that fails from the default starting
+    values as well, a cold retry would only double the cost of every infeasible point
+    of a continuation chain.
+    """
+    history = getattr(network, 'residual_history', [])
+    return not network.lin_dep and len(history) > 1 and history[-1] > history[0]
+
+
+def solve_mode(model, mode, Tsto_in, Tsto_out, Tenv, **kwargs):
+    """
+    Solve one operating mode and reduce it to picklable scalars.
+
+    Keyword arguments are passed on to ``solve_tables``.
+
+    Returns:
+        dict: KPI, exergy efficiency ``eps`` in %, network ``E_F/E_P/E_D/E_L total``
+        and ``E_D <component>`` in W, the number of Newton iterations and the convergence flag.
+    """
+    return solve_tables(model, mode, Tsto_in, Tsto_out, Tenv, **kwargs)['record']
+
+
+def failed_record(network, mode, status=None):
+    """
+    Record of a solve that did not converge.
+
+    It holds the keys of ``evaluate`` without the per-component exergy destruction,
+    the KPI of the mode, ``eps`` and the exergy totals are NaN. A sweep therefore has
+    the same columns whether a mode converged at some point or not.
+
+    Args:
+        network (Network): Network of the solve, None if it raised before solving.
+        mode (str): 'charging' or 'discharging'.
+        status (str, optional): Failure status, default ``instrument.status`` of the network.
+    """
+    nan = float('nan')
+    record = {'COP' if mode == 'charging' else 'eta': nan, 'Q_sto': nan, 'P_el': nan,
+              'iterations': getattr(network, 'iter', -1) + 1, 'converged': False,
+              'status': instrument.status(network) if status is None else status, 'eps': nan}
+    record.update({f"{key} total": nan for key in ('E_F', 'E_P', 'E_D', 'E_L')})
+    return record
+
+
+def evaluate(model, mode, network, ep, ef, ean):
+    """Reduce a solved network and its exergy analysis to KPI, solver statistics and exergy results."""
+    result = performance(model, mode, network, ep, ef)
+    result['iterations'] = network.iter + 1
+    result['converged'] = bool(network.converged)
+    result['status'] = instrument.status(network)
+    result['eps'] = 100 * ean.network_data.epsilon
+    result.update({f"{key} total": float(ean.network_data[key]) for key in ('E_F', 'E_P', 'E_D', 'E_L')})
+    result.update({f"E_D {label}": float(value)
+                   for label, value in ean.component_data['E_D'].items()})
+    return result
+
+
+def solve_point(model, point, pamb=1, Tamb=10, systems=None, cache=None, detail=False, retry=None):
+    """
+    Solve charging and discharging for one grid point.
+
+    Args:
+        model (str): Model name.
+        point (dict): Boundary temperatures ``Tsto_in``, ``Tsto_out``, ``Tenv``, other
+            keys are component/connection parameters, see ``system.set_params``.
+        systems (dict, optional): ``ModelSystem`` per mode to re-solve instead of
+            building new networks.
+        cache (ResultCache, optional): Cache to read solved modes from and store them in.
+        detail (bool, optional): Also return the long-format connection and component
+            tables of both modes, see ``results_store.extract``.
+        retry (RetryLadder, optional): Retry non-convergent modes, see ``retry.RetryLadder``.
+            The record then holds the converged ``strategy`` and the ``failure`` class per mode.
+
+    Returns:
+        dict: Flat record with the point, COP, eta, eps_char, eps_dis and the
+        per-component exergy destruction of both modes. With ``detail`` a dict of
+        ``record``, ``connections`` and ``components``.
+    """
+    record = dict(point)
+    params = {key: value for key, value in point.items() if key not in BOUNDARY}
+    connections, components = [], []
+    for mode, suffix in zip(MODES, ('char', 'dis')):
+        system = None if systems is None else systems[mode]
+        if retry is None:
+            tables = solve_tables(model, mode, point['Tsto_in'], point['Tsto_out'], point['Tenv'],
+                                  pamb=pamb, Tamb=Tamb, cache=cache, params=params, system=system)
+        else:
+            tables = retry.solve(model, mode, point, pamb=pamb, Tamb=Tamb, cache=cache, system=system)
+        # a mode that did not converge has no result tables
+        if detail and 'results' in tables:
+            mode_connections, mode_components = extract(tables, mode)
+            connections.append(mode_connections)
+            components.append(mode_components)
+        result = dict(tables['record'])
+        record['eps_' + suffix] = result.pop('eps')
+        for key, value in result.items():
+            if key in ('COP', 'eta'):
+                record[key] = value
+            else:
+                record[f"{key} ({suffix})"] = value
+    if detail:
+        return {'record': record,
+                'connections': pd.concat(connections, ignore_index=True) if connections else pd.DataFrame(),
+                'components': pd.concat(components, ignore_index=True) if components else pd.DataFrame()}
+    return record
+
+
+def _solve_chain_job(job):
+    """
+    Solve a chain of grid points in a worker and stream every result to the queue.
+
+    With ``warm`` the networks are built once for the chain and each point starts
+    from the converged state of its predecessor.
+    """
+    model, chain, pamb, Tamb, cache, detail, warm, retry, queue = job
+    systems = None
+    for index, point in chain:
+        try:
+            if warm and systems is None:
+                systems = {mode: ModelSystem(model, mode, **{key: point[key] for key in BOUNDARY})
+                           for mode in MODES}
+            queue.put((index, solve_point(model, point, pamb, Tamb, systems=systems, cache=cache,
+                                          detail=detail, retry=retry)))
+        except BaseException as e:
+            try:
+                queue.put((index, e))
+            except Exception:
+                # the exception does not pickle, send its message instead
+                queue.put((index, RuntimeError(f"{type(e).__name__}: {e}")))
+            raise
+
+
+def split_chains(sequence, n):
+    """Split a sequence into n contiguous, nearly equal parts."""
+    size, rest = divmod(len(sequence), n)
+    bounds = list(itertools.accumulate([0] + [size + (i < rest) for i in range(n)]))
+    return [sequence[bounds[i]:bounds[i + 1]] for i in range(n) if bounds[i] < bounds[i + 1]]
+
+
+def point_key(point):
+    """Hashable identity of a grid point, used to match checkpointed results."""
+    return json.dumps({key: canonical(value) for key, value in point.items()}, sort_keys=True)
+
+
+def iter_sweep(model, grid, workers=None, chunksize=1, pamb=1, Tamb=10, continuation=False, cache=None,
+               detail=False, skip=(), retry=None):
+    """
+    Solve a parameter grid and yield every point as soon as it is finished.
+
+    Args:
+        model (str): One of MODELS.
+        grid (list): Grid points as produced by ``make_grid``.
+        workers (int, optional): Number of processes, ``1`` solves in-process.
+        chunksize (int, optional): Grid points handed to a worker at once, ignored with
+            ``continuation``.
+        continuation (bool, optional): Walk the grid along ``order_grid``, build the
+            networks once per worker and start every solve from the converged state
+            of the previous point. The path is cut into one contiguous chain per worker.
+        cache (ResultCache, optional): Reuse solves stored in this cache and add new ones.
+        detail (bool, optional): Yield the long-format tables as well, see ``solve_point``.
+        skip (set, optional): Grid indices not to solve, e.g. when resuming.
+        retry (RetryLadder, optional): Retry non-convergent points, see ``retry.RetryLadder``.
+            Solver exceptions then no longer abort the sweep.
+
+    Yields:
+        tuple: Grid index and result of ``solve_point``, in completion order.
+
+    Raises:
+        RuntimeError: If a worker process died without reporting its points.
+    """
+    model = model_name(model)
+    load_model(model)
+    if grid and set(grid[0]) - set(BOUNDARY):
+        check_params(model, grid[0])
+    workers = workers or os.cpu_count()
+    order = [i for i in (order_grid(grid) if continuation else range(len(grid))) if i not in skip]
+    chains = (split_chains(order, workers) if continuation
+              else [order[start:start + chunksize] for start in range(0, len(order), chunksize)])
+    chains = [[(i, grid[i]) for i in chain] for chain in chains]
+
+    if workers == 1:
+        queue = SimpleQueue()
+        for chain in chains:
+            _solve_chain_job((model, chain, pamb, Tamb, cache, detail, continuation, retry, queue))
+            while not queue.empty():
+                yield queue.get()
+        return
+
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        queue = manager.Queue()
+        futures = [pool.submit(_solve_chain_job,
+                               (model, chain, pamb, Tamb, cache, detail, continuation, retry, queue))
+                   for chain in chains]
+        try:
+            remaining = len(order)
+            while remaining:
+                try:
+                    index, result = queue.get(timeout=POLL_INTERVAL)
+                except Empty:
+                    _check_workers(futures, queue)
+                    continue
+                if isinstance(result, BaseException):
+                    raise result
+                remaining -= 1
+                yield index, result
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _check_workers(futures, queue):
+    """Raise if a worker failed or all finished without sending the missing points."""
+    for future in futures:
+        # e.g. BrokenProcessPool after a worker was killed, or a result that did not pickle
+        if future.done() and not future.cancelled() and future.exception() is not None:
+            raise RuntimeError('A sweep worker failed without reporting its points.') from future.exception()
+    if all(future.done() for future in futures) and queue.empty():
+        raise RuntimeError('The sweep workers finished without reporting all points.')
+
+
+def _checkpoint_entries(path):
+    """Parsed lines of a checkpoint file, a line cut off by a crash is skipped."""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def read_checkpoint(path, fields=None):
+    """
+    Read the finished points of a checkpoint file.
+
+    A line cut off by a crash is ignored, its point is solved again on resume.
+
+    Args:
+        path (str): Checkpoint file.
+        fields (tuple, optional): Entry fields kept besides the point, e.g. ``('record',)``
+            to leave out the detail tables. All by default.
+
+    Returns:
+        dict: Checkpoint entries by ``point_key``.
+    """
+    entries = {}
+    for entry in _checkpoint_entries(path):
+        if fields is not None:
+            entry = {key: entry[key] for key in ('point', *fields) if key in entry}
+        entries[point_key(entry['point'])] = entry
+    return entries
+
+
+def _checkpoint_table(path, grid, table):
+    """One detail table of all grid points in a checkpoint, ``Iteration`` is the grid index."""
+    index = {point_key(point): i for i, point in enumerate(grid)}
+    frames = {}
+    for entry in _checkpoint_entries(path):
+        i = index.get(point_key(entry['point']))
+        if i is not None:
+            frames[i] = pd.DataFrame(entry.get(table, [])).assign(Iteration=i)
+    return pd.concat([frames[i] for i in sorted(frames)], ignore_index=True)
+
+
+def run_sweep(model, grid, workers=None, chunksize=1, pamb=1, Tamb=10, continuation=False, cache=None,
+              store=None, checkpoint=None, resume=True, retry=None):
+    """
+    Solve a parameter grid in a process pool.
+
+    Every worker builds and solves its own networks, only scalar records are sent
+    back. Results are returned in grid order regardless of the number of workers.
+
+    Args:
+        model (str): One of MODELS.
+        grid (list): Grid points as produced by ``make_grid``.
+        workers (int, optional): Number of processes, ``1`` solves in-process.
+        chunksize (int, optional): Grid points handed to a worker at once, see ``iter_sweep``.
+        continuation (bool, optional): Warm-start neighbouring points, see ``iter_sweep``.
+        cache (ResultCache, optional): Reuse solves stored in this cache and add new ones.
+        store (str or ResultsStore, optional): Write the points together with the
+            long-format connection states and component KPIs to this Parquet store.
+        checkpoint (str, optional): JSON lines file every finished point is appended to
+            immediately. Only the scalar records are then held in memory, the detail
+            tables of ``store`` are read back from the file one table at a time.
+            Without it all results are held in memory until the end.
+        resume (bool, optional): Skip points already in ``checkpoint``. Default True.
+        retry (RetryLadder, optional): Retry non-convergent points, see ``iter_sweep``.
+
+    Returns:
+        pd.DataFrame: One row per grid point.
+    """
+    detail = store is not None
+    options = dict(workers=workers, chunksize=chunksize, pamb=pamb, Tamb=Tamb, continuation=continuation,
+                   cache=cache, detail=detail, retry=retry)
+    if checkpoint is None:
+        results = dict(iter_sweep(model, grid, **options))
+        records = [results[i]['record'] if detail else results[i] for i in range(len(grid))]
+    else:
+        done = ({key: entry['record'] for key, entry in read_checkpoint(checkpoint, fields=('record',)).items()}
+                if resume else {})
+        skip = {i for i, point in enumerate(grid) if point_key(point) in done}
+        os.makedirs(os.path.dirname(checkpoint) or '.', exist_ok=True)
+        with open(checkpoint, 'a' if resume else 'w') as f:
+            for index, result in iter_sweep(model, grid, skip=skip, **options):
+                record = result['record'] if detail else result
+                entry = {'point': grid[index], 'record': record}
+                if detail:
+                    entry.update({table: result[table].to_dict('records') for table in DETAIL_TABLES})
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                done[point_key(grid[index])] = record
+        records = [done[point_key(point)] for point in grid]
+
+    df = pd.DataFrame(records)
+    df.insert(0, 'Iteration', range(len(df)))
+    if detail:
+        if not isinstance(store, ResultsStore):
+            store = ResultsStore(store)
+        store.write(df)
+        for table in DETAIL_TABLES:
+            if checkpoint is None:
+                frame = pd.concat([results[i][table].assign(Iteration=i) for i in range(len(grid))],
+                                  ignore_index=True)
+            else:
+                frame = _checkpoint_table(checkpoint, grid, table)
+            store.write_table(table, frame)
+            del frame
+    return df
@@ -0,0 +1,196 @@
+import importlib
+import numbers
+
+from tespy.networks import Network
+
+import instrument
+
+MODELS = ('model1', 'model1_ihx', 'model2', 'model2_ihx')
+MODES = ('charging', 'discharging')
+BOUNDARY = ('Tsto_in', 'Tsto_out', 'Tenv')
+
+
+def load_model(model):
+    """
+    Import a model module by name.
+
+    Args:
+        model (str or module): One of MODELS or an already imported model module.
+
+    Returns:
+        module: The model module providing ``create_system``.
+    """
+    if isinstance(model, str):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model '{model}', choose from {MODELS}.")
+        return importlib.import_module(model)
+    return model
+
+
+def model_name(model):
+    """Return the registry name of a model given as string or module."""
+    return model if isinstance(model, str) else model.__name__
+
+
+def new_network():
+    """Create an empty network in the unit system used by all models."""
+    return Network(p_unit='bar', T_unit='C', h_unit='kJ / kg')
+
+
+def canonical(value):
+    """Parameter value as used in keys, numbers as float so that 70 and 70.0 match."""
+    return float(value) if isinstance(value, numbers.Real) else value
+
+
+def split_param(name):
+    """
+    Split a parameter name '[<mode>:]<label>.<parameter>'.
+
+    Returns:
+        tuple: Mode (None if not qualified), label and parameter.
+    """
+    mode, qualified, rest = name.partition(':')
+    if qualified:
+        if mode not in MODES:
+            raise ValueError(f"Parameter '{name}' is qualified with unknown mode '{mode}', choose from {MODES}.")
+        name = rest
+    label, _, attr = name.rpartition('.')
+    if not label:
+        raise ValueError(f"Parameter '{name}' is not of the form '<label>.<parameter>'.")
+    return (mode if qualified else None), label, attr
+
+
+def set_params(network, params, mode=None):
+    """
+    Set component or connection parameters given as '[<mode>:]<label>.<parameter>'.
+
+    Parameters of labels that are not part of the network, or qualified with the
+    other mode, are skipped, so the same set can be passed to the charging and the
+    discharging network. A label present in both networks, e.g. 'Turbine' of
+    model2, has to be qualified, see ``check_params``.
+
+    Args:
+        network (Network): Network with its connections added.
+        params (dict): Values by name, e.g. ``{'Compressor.eta_s': 0.85, 'c2.p': 9,
+            'discharging:Turbine.eta_s': 0.88}``.
+        mode (str, optional): Mode of the network, qualified parameters of the other
+            mode are skipped.
+
+    Returns:
+        set: Names of the parameters that were set.
+    """
+    applied = set()
+    for name, value in (params or {}).items():
+        param_mode, label, attr = split_param(name)
+        if mode is not None and param_mode not in (None, mode):
+            continue
+        if label in network.comps.index:
+            network.get_comp(label).set_attr(**{attr: value})
+        elif label in network.conns.index:
+            network.get_conn(label).set_attr(**{attr: value})
+        else:
+            continue
+        applied.add(name)
+    return applied
+
+
+def check_params(model, names):
+    """
+    Raise if a parameter name matches no component or connection, or is ambiguous.
+
+    An unqualified name must match a label of exactly one mode, labels present in
+    both modes are set per mode as 'charging:<label>.<parameter>' and
+    'discharging:<label>.<parameter>'.
+
+    Args:
+        model (str): One of MODELS.
+        names (iterable): Parameter names, boundary temperatures are ignored.
+    """
+    labels = {}
+    for mode in MODES:
+        network = new_network()
+        load_model(model).build_system(network, mode=mode, Tsto_in=70, Tsto_out=180, Tenv=10)
+        labels[mode] = set(network.comps.index) | set(network.conns.index)
+    unknown, ambiguous = [], []
+    for name in names:
+        if name in BOUNDARY:
+            continue
+        mode, label, _ = split_param(name)
+        found = [m for m in ((mode,) if mode else MODES) if label in labels[m]]
+        if not found:
+            unknown.append(name)
+        elif len(found) > 1:
+            ambiguous.append(name)
+    if unknown:
+        raise ValueError(f"Parameter(s) {unknown} match no component or connection of {model_name(model)}.")
+    if ambiguous:
+        raise ValueError(f"Parameter(s) {ambiguous} match a label of both modes of {model_name(model)}, "
+                         f"qualify them as 'charging:<label>.<parameter>' or 'discharging:<label>.<parameter>'.")
+
+
+class ModelSystem:
+    """
+    Network of one model and mode, built once and re-solved for new boundary conditions.
+
+    The components, connections and busses are created a single time. Changing the
+    storage or ambient temperatures only updates the boundary connections, and the
+    next solve starts from the previous converged state.
+
+    Args:
+        model (str or module): One of MODELS.
+        mode (str, optional): 'charging' or 'discharging'.
+        Tsto_in, Tsto_out, Tenv (float): Initial boundary temperatures in °C.
+        params (dict, optional): Component/connection parameters, see ``set_params``.
+    """
+
+    def __init__(self, model, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None, params=None):
+        self.model = model_name(model)
+        self.mode = mode
+        self.module = load_model(model)
+        self.boundary = {'Tsto_in': Tsto_in, 'Tsto_out': Tsto_out, 'Tenv': Tenv}
+        self.network = new_network()
+        self.parts = self.module.build_system(self.network, mode=mode, **self.boundary)
+        self.ep, self.ef, self.el = self.parts[1:4]
+        self.params = {}
+        self.set_params(params)
+
+    def set_boundary(self, **boundary):
+        """
+        Update storage and ambient temperatures, omitted values are kept.
+
+        Args:
+            **boundary: Any of ``Tsto_in``, ``Tsto_out``, ``Tenv`` in °C.
+        """
+        unknown = set(boundary) - set(BOUNDARY)
+        if unknown:
+            raise ValueError(f"Unknown boundary condition(s) {sorted(unknown)}, choose from {BOUNDARY}.")
+        if all(self.boundary[key] == value for key, value in boundary.items()):
+            return
+        self.boundary.update(boundary)
+        self.module.set_boundary(self.network, self.mode, **self.boundary)
+
+    def set_params(self, params):
+        """Update component/connection parameters, unchanged values are not set again."""
+        changed = {name: value for name, value in (params or {}).items() if self.params.get(name) != value}
+        self.params.update(changed)
+        set_params(self.network, changed, self.mode)
+
+    def solve(self, init_path=None, init_previous=True, design_path=None, **kwargs):
+        """
+        Solve the network for the current boundary conditions.
+
+        Args:
+            init_path (str, optional): Saved network to take starting values from.
+            init_previous (bool, optional): Start from the last solution, default True.
+            design_path (str, optional): Saved design case, solves in offdesign mode
+                against it instead of solving the design case.
+            **kwargs: Passed on to ``Network.solve``, e.g. ``max_iter``.
+
+        Returns:
+            bool: Whether the solver converged.
+        """
+        mode = 'design' if design_path is None else 'offdesign'
+        context = {'model': self.model, 'mode': self.mode, **self.boundary, 'params': self.params}
+        instrument.solve(self.network, mode, context, init_path=init_path, init_previous=init_previous,
+                         design_path=design_path, **kwargs)
+        return bool(self.network.converged)
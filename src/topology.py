@@ -0,0 +1,95 @@
+import copy
+
+from tespy import components
+from tespy.connections import Bus, Connection
+
+from system import BOUNDARY, MODES
+
+# Sections of a mode spec that patches merge by label
+SECTIONS = ('connections', 'attributes', 'boundary', 'busses')
+
+
+def patch(spec, changes):
+    """
+    Derive a model variant from a topology spec.
+
+    Args:
+        spec (dict): Topology spec, see ``build``.
+        changes (dict): ``components`` to add and per mode the entries of SECTIONS to
+            add or replace by label; ``None`` removes an entry. Attributes of existing
+            labels are merged, ``returns`` replaces the returned components.
+
+    Returns:
+        dict: The patched copy of ``spec``.
+    """
+    result = copy.deepcopy(spec)
+    result['components'].update(changes.get('components', {}))
+    for mode in MODES:
+        mode_changes = copy.deepcopy(changes.get(mode, {}))
+        if 'returns' in mode_changes:
+            result[mode]['returns'] = mode_changes.pop('returns')
+        for section, entries in mode_changes.items():
+            if section not in SECTIONS:
+                raise ValueError(f"Unknown section '{section}', choose from {SECTIONS}.")
+            target = result[mode][section]
+            for label, value in entries.items():
+                if value is None:
+                    target.pop(label, None)
+                elif section == 'attributes' and label in target:
+                    target[label] = dict(target[label], **value)
+                else:
+                    target[label] = value
+    return result
+
+
+def build(spec, network, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None):
+    """
+    Build the network of one mode from a topology spec.
+
+    Only the components connected in ``mode`` are instantiated.
+
+    Args:
+        spec (dict): ``components`` maps every label to its TESPy class name; per mode
+            ``connections`` maps a label to (source, outlet, target, inlet),
+            ``attributes`` maps component and connection labels to their fixed
+            parameters, ``boundary`` maps connection labels to {parameter: (boundary
+            temperature, offset)}, ``busses`` maps the roles 'ep', 'ef' and 'el' to the
+            bus label and its components, ``returns`` lists the components returned
+            after the busses.
+        network (Network): Empty network to add the connections and busses to.
+        mode (str, optional): 'charging' or 'discharging'.
+        Tsto_in, Tsto_out, Tenv (float): Boundary temperatures in °C.
+
+    Returns:
+        tuple: network, product, fuel and loss bus and the ``returns`` components.
+    """
+    if Tsto_out is None or Tsto_in is None or Tenv is None:
+        raise ValueError("Missing required temperature values.")
+    mode_spec = spec[mode]
+
+    labels = dict.fromkeys(label for source, _, target, _ in mode_spec['connections'].values()
+                           for label in (source, target))
+    comps = {label: getattr(components, spec['components'][label])(label) for label in labels}
+    conns = {label: Connection(comps[source], outlet, comps[target], inlet, label=label)
+             for label, (source, outlet, target, inlet) in mode_spec['connections'].items()}
+    network.add_conns(*conns.values())
+
+    for label, attributes in mode_spec['attributes'].items():
+        (comps[label] if label in comps else conns[label]).set_attr(**copy.deepcopy(attributes))
+    apply_boundary(spec, network, mode, Tsto_in, Tsto_out, Tenv)
+
+    busses = {}
+    for role, (name, entries) in mode_spec['busses'].items():
+        busses[role] = Bus(name)
+        busses[role].add_comps(*[dict(entry, comp=comps[entry['comp']]) for entry in entries])
+    network.add_busses(*busses.values())
+    network.set_attr(iterinfo=False)
+    return (network, busses['ep'], busses['ef'], busses['el'], *[comps[label] for label in mode_spec['returns']])
+
+
+def apply_boundary(spec, network, mode='charging', Tsto_in=None, Tsto_out=None, Tenv=None):
+    """Set the connection parameters bound to the boundary temperatures."""
+    values = dict(zip(BOUNDARY, (Tsto_in, Tsto_out, Tenv)))
+    for label, parameters in spec[mode]['boundary'].items():
+        network.get_conn(label).set_attr(**{parameter: values[name] + offset
+                                            for parameter, (name, offset) in parameters.items()})
@@ -0,0 +1,63 @@
+import pickle
+import sqlite3
+
+import pytest
+
+from cache import ResultCache
+
+BOUNDARY = {'Tsto_in': 70, 'Tsto_out': 180, 'Tenv': 10, 'pamb': 1, 'Tamb': 10}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / 'cache.sqlite'))
+
+
+def test_key(cache):
+    key = cache.key('model1', 'charging', BOUNDARY)
+    assert key == cache.key('model1', 'charging', {name: float(value) for name, value in BOUNDARY.items()})
+    assert key != cache.key('model1', 'discharging', BOUNDARY)
+    assert key != cache.key('model2', 'charging', BOUNDARY)
+    assert key != cache.key('model1', 'charging', dict(BOUNDARY, Tenv=15))
+    assert key != cache.key('model1', 'charging', BOUNDARY, {'Turbine.eta_s': 0.9})
+    assert cache.key('model1', 'charging', BOUNDARY, {'Turbine.eta_s': 0.9}) == \
+        cache.key('model1', 'charging', BOUNDARY, {'Turbine.eta_s': 0.90})
+
+
+def test_hit_and_miss(cache):
+    key = cache.key('model1', 'charging', BOUNDARY)
+    assert cache.get(key) is None
+    cache.put(key, 'model1', {'record': {'COP': 3.2}})
+    assert cache.get(key) == {'record': {'COP': 3.2}}
+    assert cache.get(cache.key('model1', 'charging', dict(BOUNDARY, Tenv=15))) is None
+
+
+def test_invalidate_changed_model(cache):
+    key = cache.key('model1', 'charging', BOUNDARY)
+    cache.put(key, 'model1', {'record': {}})
+    # an entry computed from another version of the model source
+    with sqlite3.connect(cache.path) as db:
+        db.execute("UPDATE results SET model_hash = 'outdated'")
+    fresh = ResultCache(cache.path)
+    fresh.model_hash('model1')
+    assert fresh.get(key) is None
+
+
+def test_evict_least_recently_used(cache):
+    keys = [cache.key('model1', 'charging', dict(BOUNDARY, Tenv=t)) for t in range(3)]
+    for key in keys:
+        cache.put(key, 'model1', {'data': bytes(1000)})
+    cache.get(keys[0])
+    cache.max_bytes = 2500
+    cache.evict()
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+
+def test_pickle_without_connection(cache):
+    key = cache.key('model1', 'charging', BOUNDARY)
+    cache.put(key, 'model1', {'record': {}})
+    clone = pickle.loads(pickle.dumps(cache))
+    assert clone._db is None
+    assert clone.get(key) == {'record': {}}
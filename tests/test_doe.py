@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from doe import full_factorial, latin_hypercube, saltelli, sobol_indices
+
+BOUNDS = {'x1': (-np.pi, np.pi), 'x2': (-np.pi, np.pi), 'x3': (-np.pi, np.pi)}
+
+
+def ishigami(x1, x2, x3, a=7, b=0.1):
+    return np.sin(x1) + a * np.sin(x2) ** 2 + b * x3 ** 4 * np.sin(x1)
+
+
+def ishigami_outputs(n, seed=0):
+    samples = saltelli(BOUNDS, n, seed=seed)
+    return samples, np.array([ishigami(**sample) for sample in samples])
+
+
+def test_full_factorial():
+    design = full_factorial({'a': [1, 2], 'b': ['x', 'y', 'z']})
+    assert len(design) == 6
+    assert design[0] == {'a': 1, 'b': 'x'}
+    assert design[-1] == {'a': 2, 'b': 'z'}
+
+
+def test_latin_hypercube_strata():
+    samples = latin_hypercube({'a': (0, 10), 'b': (-1, 1)}, 20, seed=1)
+    a = np.array([sample['a'] for sample in samples])
+    b = np.array([sample['b'] for sample in samples])
+    # one sample in each of the 20 strata of every parameter
+    assert sorted(np.floor(a / 0.5).astype(int)) == list(range(20))
+    assert sorted(np.floor((b + 1) / 0.1).astype(int)) == list(range(20))
+
+
+def test_saltelli_design():
+    samples = saltelli(BOUNDS, 8, seed=0)
+    X = np.array([[sample[name] for name in BOUNDS] for sample in samples]).reshape(5, 8, 3)
+    A, B, AB = X[0], X[1], X[2:]
+    for i in range(3):
+        assert np.array_equal(AB[i][:, i], B[:, i])
+        assert np.array_equal(np.delete(AB[i], i, axis=1), np.delete(A, i, axis=1))
+
+
+def test_sobol_indices_ishigami():
+    _, y = ishigami_outputs(2 ** 14)
+    first, total = sobol_indices(y, 3)
+    # analytic indices of the Ishigami function with a = 7, b = 0.1
+    assert first == pytest.approx([0.3139, 0.4424, 0.0], abs=0.03)
+    assert total == pytest.approx([0.5576, 0.4424, 0.2437], abs=0.03)
+
+
+def test_sobol_indices_skip_nan():
+    _, y = ishigami_outputs(2 ** 12)
+    y[::50] = np.nan
+    first, total = sobol_indices(y, 3)
+    assert np.all(np.isfinite(first)) and np.all(np.isfinite(total))
+    assert total == pytest.approx([0.5576, 0.4424, 0.2437], abs=0.05)
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from hx_sizing import SIZING_DTYPE, area, lmtd
+
+
+def test_lmtd():
+    assert lmtd(20, 10) == pytest.approx(10 / np.log(2))
+    assert lmtd(10, 20) == pytest.approx(lmtd(20, 10))
+
+
+def test_lmtd_equal_ends():
+    assert lmtd(15, 15) == pytest.approx(15)
+    assert lmtd(15, 15 * (1 + 1e-12)) == pytest.approx(15)
+
+
+def test_lmtd_arrays():
+    dT_a, dT_b = np.array([20.0, 5.0, 8.0]), np.array([10.0, 5.0, 2.0])
+    expected = [10 / np.log(2), 5, 6 / np.log(4)]
+    assert lmtd(dT_a, dT_b) == pytest.approx(expected)
+
+
+def test_area():
+    sizing = {'summary': np.array([('Evaporator', 100.0, 5e4, 2.0, 3.0), ('Condenser', 80.0, 2e4, 4.0, 5.0)],
+                                  dtype=SIZING_DTYPE)}
+    assert area(sizing, 1000) == pytest.approx({'Evaporator': 50, 'Condenser': 20})
+    assert area(sizing, {'Evaporator': 500, 'Condenser': 2000}, 'Condenser') == pytest.approx(10)
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from offdesign import invalid_design
+
+
+def heat_exchanger(label, ttd_u, ttd_l, kA, offdesign=('kA_char',)):
+    value = SimpleNamespace
+    return SimpleNamespace(label=label, ttd_u=value(val=ttd_u), ttd_l=value(val=ttd_l), kA=value(val=kA),
+                           offdesign=list(offdesign))
+
+
+def test_invalid_design():
+    comps = [
+        heat_exchanger('valid', 5.0, 3.0, 1e4),
+        heat_exchanger('negative ttd', -170.0, 1.0, 1e4),
+        heat_exchanger('pinched', 120.0, -1e-7, 1e4),
+        heat_exchanger('no kA', 5.0, 3.0, float('nan')),
+        heat_exchanger('design only', -5.0, 3.0, float('nan'), offdesign=()),
+    ]
+    network = SimpleNamespace(comps=pd.DataFrame({'object': comps}))
+    assert invalid_design(network) == ['negative ttd', 'pinched', 'no kA']
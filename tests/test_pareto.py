@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pareto
+from pareto import crowding_distance, non_dominated_sort, nsga2, rank_population
+
+
+def test_non_dominated_sort():
+    F = np.array([[1, 5], [2, 3], [4, 1], [3, 4], [5, 5], [2, 3]])
+    assert non_dominated_sort(F).tolist() == [0, 0, 0, 1, 2, 0]
+
+
+def test_non_dominated_sort_chain():
+    F = np.array([[3, 3], [1, 1], [2, 2]])
+    assert non_dominated_sort(F).tolist() == [2, 0, 1]
+
+
+def test_crowding_distance():
+    F = np.array([[0, 4], [1, 2], [2, 1], [4, 0]])
+    distance = crowding_distance(F)
+    assert np.isinf(distance[[0, 3]]).all()
+    # normalized gaps between the neighbours, summed over both objectives
+    assert np.allclose(distance[1:3], [2 / 4 + 3 / 4, 3 / 4 + 2 / 4])
+
+
+def test_crowding_distance_two_points():
+    assert np.isinf(crowding_distance(np.array([[0, 1], [1, 0]]))).all()
+
+
+def test_rank_population():
+    records = [
+        {'converged': True, 'violation': 0, 'RTE': 0.6, 'specific investment': 100},
+        {'converged': True, 'violation': 0, 'RTE': 0.5, 'specific investment': 200},
+        {'converged': True, 'violation': 2.0, 'RTE': 0.7, 'specific investment': 50},
+        {'converged': True, 'violation': 0.5, 'RTE': 0.7, 'specific investment': 50},
+        {'converged': False, 'violation': np.inf, 'RTE': np.nan, 'specific investment': np.nan},
+    ]
+    rank, distance = rank_population(records)
+    # infeasible points follow the fronts in order of their violation, failed solves last
+    assert rank.tolist() == [0, 1, 3, 2, 4]
+    assert np.isinf(distance[:2]).all()
+
+
+class FailingEvaluator:
+    """Evaluator stand-in whose individuals all fail to converge."""
+
+    def __init__(self, model, bounds, fixed, *args, **kwargs):
+        self.bounds, self.fixed, self.records = bounds, fixed, []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def point(self, x):
+        return dict(self.fixed, **dict(zip(self.bounds, x)))
+
+    def evaluate(self, points):
+        records = [dict(point, converged=False, violation=np.inf) for point in points]
+        self.records += records
+        return records
+
+    def history(self):
+        return pd.DataFrame(self.records)
+
+
+def test_nsga2_without_converged_individual(monkeypatch):
+    monkeypatch.setattr(pareto, 'Evaluator', FailingEvaluator)
+    with pytest.raises(RuntimeError, match='converged'):
+        nsga2('model2', fixed={'Tsto_in': 75, 'Tsto_out': 180, 'Tenv': 10}, pop_size=4, generations=1, seed=0)
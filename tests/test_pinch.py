@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from CoolProp.CoolProp import PropsSI as PSI
+
+from pinch import BACKENDS, abstract_state, pinch_analysis, temperature_hp
+
+
+def water_hx():
+    """Connection results of a counterflow water/water heat exchanger with equal mass flows."""
+    states = {'h_in': (120, 5), 'h_out': (60, 5), 'c_in': (20, 5), 'c_out': (80, 5)}
+    return pd.DataFrame({'T': [T for T, _ in states.values()], 'p': [p for _, p in states.values()],
+                        'h': [PSI('H', 'T', T + 273.15, 'P', p * 1e5, 'water') / 1e3 for T, p in states.values()],
+                        'm': 1.0, 'fluid': 'water'}, index=list(states))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_temperature_hp(backend):
+    T = np.array([300.0, 350.0, 420.0])
+    p = np.array([1e5, 5e5, 5e5])
+    h = PSI('H', 'T', T, 'P', p, 'HEOS::water')
+    assert temperature_hp(abstract_state(backend, 'water'), h, p) == pytest.approx(T, abs=0.2)
+
+
+def test_temperature_hp_failed_state():
+    T = temperature_hp(abstract_state('HEOS', 'water'), np.array([1e5, -1e9]), np.array([1e5, 1e5]))
+    assert np.isfinite(T[0]) and np.isnan(T[1])
+
+
+def test_abstract_state_unknown_backend():
+    with pytest.raises(ValueError):
+        abstract_state('BICUBIC&HEOS', 'water')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_pinch_analysis(backend):
+    result = pinch_analysis(water_hx(), ['h_in'], ['h_out'], ['c_in'], ['c_out'], step_number=20, backend=backend)
+    profile = result['profiles'][0]
+    assert profile['T_hot'][[0, -1]] == pytest.approx([60, 120], abs=0.2)
+    assert profile['T_cold'][[0, -1]] == pytest.approx([20, 80], abs=0.2)
+    # equal heat capacity flows, the temperature difference is nearly constant
+    assert result['summary']['dT_min'][0] == pytest.approx(40, abs=1)
+    assert profile['Q'][-1] == pytest.approx(water_hx().loc['c_out', 'h'] - water_hx().loc['c_in', 'h'])
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from exergy import from_store
+from results_store import ResultsStore
+
+
+def sweep_tables():
+    """Tables of a two point sweep as written by ``run_sweep``, charging never converged."""
+    points = pd.DataFrame({'Iteration': [0, 1], 'Tenv': [5.0, 10.0], 'COP': [np.nan, np.nan],
+                           'eta': [20.0, 21.0], 'eps_char': [np.nan, np.nan], 'eps_dis': [50.0, 52.0]})
+    for name in ('E_F', 'E_P', 'E_D', 'E_L'):
+        points[f"{name} total (char)"] = np.nan
+        points[f"{name} total (dis)"] = [100.0, 110.0] if name == 'E_F' else [30.0, 35.0]
+    connections = pd.DataFrame({'Iteration': [0, 0, 1, 1], 'mode': 'discharging', 'label': ['c1', 'c2'] * 2,
+                                'fluid': 'water', 'T': [20.0, 80.0, 25.0, 85.0], 'p': 1.0,
+                                'h': [84.0, 335.0, 105.0, 356.0], 's': 0.3, 'm': 2.0})
+    components = pd.DataFrame({'Iteration': [0, 0, 1, 1], 'mode': 'discharging', 'component': ['Pump', 'Turbine'] * 2,
+                               'Q': np.nan, 'P': [1.0, -10.0, 1.0, -11.0], 'E_F': [1.0, 20.0, 1.0, 22.0],
+                               'E_P': [0.8, 10.0, 0.8, 11.0], 'E_D': [0.2, 10.0, 0.2, 11.0], 'y_D': 0.1,
+                               'epsilon': 0.5})
+    return points, connections, components
+
+
+def test_round_trip(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    points, connections, components = sweep_tables()
+    store.write(points, connections, components)
+    pd.testing.assert_frame_equal(store.points(), points)
+    pd.testing.assert_frame_equal(store.connections(), connections)
+    pd.testing.assert_frame_equal(store.components(), components)
+
+
+def test_filters(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    store.write(*sweep_tables())
+    assert len(store.components(mode='discharging')) == 4
+    assert store.components(mode='charging').empty
+    states = store.connections(iteration=1, mode='discharging')
+    assert list(states.index) == ['c1', 'c2']
+    assert states.loc['c2', 'T'] == 85.0
+
+
+def test_empty_tables_keep_their_columns(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    points, _, _ = sweep_tables()
+    store.write(points, pd.DataFrame(), pd.DataFrame())
+    assert store.components(mode='discharging').empty
+    assert {'mode', 'component', 'E_D'} <= set(store.components().columns)
+    assert store.connections(iteration=0, mode='charging').empty
+
+
+def test_from_store_without_converged_mode(tmp_path):
+    store = ResultsStore(str(tmp_path / 'store'))
+    store.write(*sweep_tables())
+    labels, array = from_store(store, 'discharging')
+    assert labels == ['Pump', 'Turbine']
+    assert array['E_D'][1] == pytest.approx([0.2, 11.0])
+    assert array['E_F_total'] == pytest.approx([100.0, 110.0])
+
+    labels, array = from_store(store, 'charging')
+    assert labels == []
+    assert len(array) == 2 and np.isnan(array['E_F_total']).all() and np.isnan(array['epsilon']).all()
@@ -0,0 +1,45 @@
+import math
+import os
+
+import pytest
+
+from retry import RetryLadder, classify
+from sweep import failed_record
+
+
+def test_classify_exception():
+    assert classify(error=ValueError('bad state')) == 'exception:ValueError'
+    assert classify({'record': {'status': 'singular'}}, error=KeyError('p')) == 'exception:KeyError'
+
+
+def test_classify_status():
+    assert classify({'record': {'converged': False, 'status': 'no_progress'}}) == 'no_progress'
+    assert classify({'record': {'converged': False}}) == 'not_converged'
+
+
+def test_failed_record_without_network():
+    record = failed_record(None, 'discharging', status='error')
+    assert record['status'] == 'error'
+    assert record['iterations'] == 0
+    assert not record['converged']
+    assert math.isnan(record['eta']) and 'COP' not in record
+    assert all(math.isnan(record[f"{key} total"]) for key in ('E_F', 'E_P', 'E_D', 'E_L'))
+
+
+def test_ladder_strategies():
+    with pytest.raises(ValueError, match='Unknown strategies'):
+        RetryLadder(strategies=('neighbour', 'restart'))
+    with RetryLadder(strategies=('relaxed',)) as ladder:
+        assert not ladder.stashing
+
+
+def test_ladder_removes_temporary_stash():
+    with RetryLadder() as ladder:
+        assert ladder.stashing and os.path.isdir(ladder.stash)
+    assert not os.path.exists(ladder.stash)
+
+
+def test_ladder_keeps_given_stash(tmp_path):
+    with RetryLadder(stash=str(tmp_path)) as ladder:
+        path = ladder.path('model2', 'charging', {'Tsto_in': 75, 'Tsto_out': 180, 'Tenv': 10})
+    assert path.startswith(str(tmp_path)) and tmp_path.is_dir()
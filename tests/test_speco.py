@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from speco import crf, speco
+
+# Open Brayton cycle: ambient air is compressed, heated by a hot gas stream and expanded.
+# Physical exergy of the streams in kW, power in kW (consumed > 0).
+EXERGY = {'a': 0.0, 'b': 90.0, 'c': 250.0, 'd': 60.0, 'h1': 300.0, 'h2': 100.0}
+PORTS = {
+    'Air Source': {'inlets': [], 'outlets': ['a']},
+    'Hot Source': {'inlets': [], 'outlets': ['h1']},
+    'Compressor': {'inlets': ['a'], 'outlets': ['b']},
+    'Heater': {'inlets': ['h1', 'b'], 'outlets': ['h2', 'c']},
+    'Turbine': {'inlets': ['c'], 'outlets': ['d']},
+    'Air Sink': {'inlets': ['d'], 'outlets': []},
+    'Hot Sink': {'inlets': ['h2'], 'outlets': []},
+}
+Z = {'Compressor': 2.0, 'Heater': 1.0, 'Turbine': 3.0}
+
+
+def cycle_tables():
+    """Result tables of the synthetic cycle, as far as ``speco`` reads them (in W)."""
+    conns = list(EXERGY)
+    return {
+        'results': {
+            'Connection': pd.DataFrame({'m': np.ones(len(conns))}, index=conns),
+            'Compressor': pd.DataFrame({'P': [100e3]}, index=['Compressor']),
+            'HeatExchanger': pd.DataFrame({'Q': [-200e3]}, index=['Heater']),
+            'Turbine': pd.DataFrame({'P': [-150e3]}, index=['Turbine']),
+        },
+        'exergy': {
+            'connections': pd.DataFrame({'E_PH': [1e3 * EXERGY[conn] for conn in conns]}, index=conns),
+            'components': pd.DataFrame({'E_F': [100e3, 200e3, 190e3], 'E_P': [90e3, 160e3, 150e3],
+                                        'E_D': [10e3, 40e3, 40e3]},
+                                       index=['Compressor', 'Heater', 'Turbine']),
+            'network': {'E_P': 150e3},
+        },
+        'ports': PORTS,
+    }
+
+
+def test_crf():
+    assert crf(0.05, 20) == pytest.approx(0.0802426)
+    assert crf(0.1, 1) == pytest.approx(1.1)
+
+
+def test_speco_cycle():
+    result = speco([cycle_tables(), cycle_tables()], c_el=0.3, source_costs={'h1': 0.05}, Z=Z)
+    C = dict(zip(result['connections'], result['C'].T))
+    # sources, compressor balance, F rule on the hot side of the heater and on the turbine
+    C_c = 1 + 15 + 32 - 5
+    C_d = C_c / 250 * 60
+    expected = {'a': 0, 'h1': 15, 'b': 32, 'h2': 5, 'c': C_c, 'd': C_d}
+    for conn, value in expected.items():
+        assert C[conn] == pytest.approx([value, value]), conn
+
+    assert result['power'] == ['Turbine']
+    C_W = 3 + C_c - C_d
+    assert result['C_W'][:, 0] == pytest.approx([C_W, C_W])
+    assert result['c_W'][:, 0] == pytest.approx([C_W / 150, C_W / 150])
+    assert result['c'][:, result['connections'].index('a')] == pytest.approx([np.nan, np.nan], nan_ok=True)
+
+    components = dict(zip(result['components'], zip(result['C_F'][0], result['C_P'][0])))
+    assert components['Compressor'] == pytest.approx((30, 32))
+    assert components['Heater'] == pytest.approx((10, C_c - 32))
+    assert components['Turbine'] == pytest.approx((C_c - C_d, C_W))
+    # fuel of all sources and the bought power plus the investment, per kW of product exergy
+    assert result['c_P_total'] == pytest.approx([(15 + 30 + 6) / 150] * 2)
+
+
+def test_speco_balances_close():
+    result = speco([cycle_tables()], c_el=0.3, source_costs={'h1': 0.05}, Z=Z)
+    k = result['components'].index('Heater')
+    # C_P = C_F + Z - C_D does not hold in general, but the cost balance does
+    C = dict(zip(result['connections'], result['C'][0]))
+    assert C['h2'] + C['c'] - C['h1'] - C['b'] == pytest.approx(Z['Heater'])
+    assert result['C_D'][0, k] == pytest.approx(10 / 200 * 40)
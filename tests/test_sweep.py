@@ -0,0 +1,40 @@
+from sweep import make_grid, order_grid, point_key, split_chains
+
+
+def test_make_grid():
+    grid = make_grid([60, 70], [150], [5, 10, 15])
+    assert len(grid) == 6
+    assert grid[0] == {'Tsto_in': 60, 'Tsto_out': 150, 'Tenv': 5}
+    assert grid[-1] == {'Tsto_in': 70, 'Tsto_out': 150, 'Tenv': 15}
+
+
+def test_order_grid_serpentine():
+    grid = make_grid([60, 70], [150, 160], [5, 10])
+    order = order_grid(grid)
+    assert sorted(order) == list(range(len(grid)))
+    path = [(grid[i]['Tsto_in'], grid[i]['Tsto_out'], grid[i]['Tenv']) for i in order]
+    assert path == [(60, 150, 5), (60, 150, 10), (60, 160, 10), (60, 160, 5),
+                    (70, 160, 5), (70, 160, 10), (70, 150, 10), (70, 150, 5)]
+
+
+def test_order_grid_neighbours_differ_by_one_step():
+    grid = make_grid([60, 65, 70], [150, 160, 170], [5, 10, 15, 20])
+    order = order_grid(grid)
+    for a, b in zip(order, order[1:]):
+        assert sum(grid[a][key] != grid[b][key] for key in grid[a]) == 1
+
+
+def test_point_key():
+    key = point_key({'Tsto_in': 70, 'Tsto_out': 180, 'Tenv': 10})
+    assert key == point_key({'Tenv': 10.0, 'Tsto_out': 180.0, 'Tsto_in': 70.0})
+    assert key != point_key({'Tsto_in': 70, 'Tsto_out': 180, 'Tenv': 15})
+    assert point_key({'Tenv': 10, 'Turbine.eta_s': 0.9}) != point_key({'Tenv': 10})
+    # non-numeric parameters are kept as they are
+    assert '"R245fa"' in point_key({'Tenv': 10, 'c1.fluid': 'R245fa'})
+
+
+def test_split_chains():
+    chains = split_chains(list(range(10)), 3)
+    assert chains == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    assert split_chains(list(range(2)), 4) == [[0], [1]]
+    assert split_chains([], 2) == []